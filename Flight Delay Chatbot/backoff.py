@@ -0,0 +1,144 @@
+"""Historical delay-rate backoff compiled into one packed integer lookup table."""
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Backoff tiers, most specific first (g1..g7); the global mean (g8) is the last resort
+TIERS = [
+    ("AIRLINE", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "MONTH", "DEP_HOUR"),
+    ("AIRLINE", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "DEP_HOUR"),
+    ("ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "DEP_HOUR"),
+    ("ORIGIN_AIRPORT", "DESTINATION_AIRPORT"),
+    ("ORIGIN_AIRPORT", "DEP_HOUR"),
+    ("DESTINATION_AIRPORT", "DEP_HOUR"),
+    ("DEP_HOUR",),
+]
+FIELDS = ["AIRLINE", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "MONTH", "DEP_HOUR"]
+TIER_SHIFT = 58
+MONTH_BITS, HOUR_BITS = 4, 5
+
+
+class BackoffIndex:
+    """All backoff tiers flattened into one sorted int64 key array.
+
+    Each key packs the tier number into the top bits and the tier's fields
+    (airline/airport codes, month, hour) below it, so resolving the whole
+    chain is one ``searchsorted`` over the tier keys of a query.
+    """
+
+    def __init__(self, airlines: Sequence[str], airports: Sequence[str],
+                 keys: np.ndarray, values: np.ndarray, global_rate: float):
+        self.airlines = list(airlines)
+        self.airports = list(airports)
+        self.airline_codes = {a: i for i, a in enumerate(self.airlines)}
+        self.airport_codes = {a: i for i, a in enumerate(self.airports)}
+        self.keys = keys
+        self.values = values
+        self.global_rate = float(global_rate)
+
+        airline_bits = max(1, len(self.airlines).bit_length())
+        airport_bits = max(1, len(self.airports).bit_length())
+        widths = [airline_bits, airport_bits, airport_bits, MONTH_BITS, HOUR_BITS]
+        self.limits = [1 << w for w in widths]
+        self.shifts = {f: int(sum(widths[i + 1:])) for i, f in enumerate(FIELDS)}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "BackoffIndex":
+        """Compute every tier's mean DELAYED_15 from a frame with DEP_HOUR/DELAYED_15 columns."""
+        airlines = sorted(pd.unique(df["AIRLINE"].dropna()))
+        airports = sorted(set(df["ORIGIN_AIRPORT"].dropna()) | set(df["DESTINATION_AIRPORT"].dropna()))
+        index = cls(airlines, airports, np.empty(0, dtype=np.int64), np.empty(0), df["DELAYED_15"].mean())
+
+        codes = index.encode(df["AIRLINE"], df["ORIGIN_AIRPORT"], df["DESTINATION_AIRPORT"],
+                             df["MONTH"], df["DEP_HOUR"])
+        delayed = df["DELAYED_15"].to_numpy()
+        keys, values = [], []
+        for tier in range(len(TIERS)):
+            tier_keys = index.tier_keys(tier, codes)
+            valid = tier_keys >= 0
+            means = pd.Series(delayed[valid]).groupby(tier_keys[valid]).mean()
+            keys.append(means.index.to_numpy(dtype=np.int64))
+            values.append(means.to_numpy(dtype=np.float64))
+        index.keys = np.concatenate(keys)
+        index.values = np.concatenate(values)
+        return index
+
+    def encode(self, airlines, origins, destinations, months, hours) -> Dict[str, np.ndarray]:
+        """Map query columns to integer codes; -1 marks values no tier can match."""
+        def lookup(table, values):
+            if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+                # Map each category once, then gather by the column's integer codes
+                cats = np.fromiter((table.get(c, -1) for c in values.cat.categories), dtype=np.int64,
+                                   count=len(values.cat.categories))
+                codes = values.cat.codes.to_numpy()
+                return np.where(codes >= 0, cats[codes] if len(cats) else -1, -1)
+            return np.fromiter((table.get(v, -1) for v in values), dtype=np.int64, count=len(values))
+
+        def bounded(values, limit):
+            out = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+            ok = ~np.isnan(out) & (out >= 0) & (out < limit)
+            return np.where(ok, np.nan_to_num(out), -1).astype(np.int64)
+
+        return {
+            "AIRLINE": lookup(self.airline_codes, airlines),
+            "ORIGIN_AIRPORT": lookup(self.airport_codes, origins),
+            "DESTINATION_AIRPORT": lookup(self.airport_codes, destinations),
+            "MONTH": bounded(months, self.limits[3]),
+            "DEP_HOUR": bounded(hours, self.limits[4]),
+        }
+
+    def tier_keys(self, tier: int, codes: Dict[str, np.ndarray]) -> np.ndarray:
+        """Packed keys of one tier; -1 where a field of the tier is unknown."""
+        fields = TIERS[tier]
+        key = np.full(len(codes["DEP_HOUR"]), tier << TIER_SHIFT, dtype=np.int64)
+        valid = np.ones(len(key), dtype=bool)
+        for f in fields:
+            valid &= codes[f] >= 0
+            key |= np.maximum(codes[f], 0) << self.shifts[f]
+        return np.where(valid, key, -1)
+
+    def lookup_many(self, airlines, origins, destinations, months, hours) -> np.ndarray:
+        """Vectorized backoff: delay rates for many (airline, origin, dest, month, hour) tuples."""
+        codes = self.encode(airlines, origins, destinations, months, hours)
+        query = np.stack([self.tier_keys(t, codes) for t in range(len(TIERS))], axis=1)
+        if not len(self.keys):
+            return np.full(len(query), self.global_rate)
+
+        # One search resolves every tier of every query; take the first tier that hits
+        pos = np.minimum(np.searchsorted(self.keys, query), len(self.keys) - 1)
+        hit = (self.keys[pos] == query) & (query >= 0)
+        first = hit.argmax(axis=1)
+        rows = np.arange(len(query))
+        return np.where(hit.any(axis=1), self.values[pos[rows, first]], self.global_rate)
+
+    def lookup(self, airline, origin, dest, month, dep_hour) -> float:
+        """Delay rate of a single tuple, backing off through g1..g7 to the global rate."""
+        codes = {
+            "AIRLINE": self.airline_codes.get(airline, -1),
+            "ORIGIN_AIRPORT": self.airport_codes.get(origin, -1),
+            "DESTINATION_AIRPORT": self.airport_codes.get(dest, -1),
+            "MONTH": _bounded_int(month, self.limits[3]),
+            "DEP_HOUR": _bounded_int(dep_hour, self.limits[4]),
+        }
+        query = []
+        for tier, fields in enumerate(TIERS):
+            if all(codes[f] >= 0 for f in fields):
+                key = tier << TIER_SHIFT
+                for f in fields:
+                    key |= codes[f] << self.shifts[f]
+                query.append(key)
+        if query and len(self.keys):
+            pos = np.minimum(np.searchsorted(self.keys, query), len(self.keys) - 1)
+            for key, p in zip(query, pos.tolist()):
+                if self.keys[p] == key:
+                    return float(self.values[p])
+        return self.global_rate
+
+
+def _bounded_int(value, limit: int) -> int:
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return -1
+    return value if 0 <= value < limit else -1
@@ -1,12 +1,129 @@
-import pandas as pd
-import sqlite3
-
-# Load parquet
-df = pd.read_parquet("flights_2015_lite.parquet")
-
-# Save into SQLite
-conn = sqlite3.connect("flights.db")
-df.to_sql("flights", conn, if_exists="replace", index=False)
-conn.close()
-
-print("✅ flights.db created successfully")
+"""Build flights.db from one or more flights parquet files.
+
+Row groups are streamed straight from parquet into a STRICT, typed table with
+executemany inside large transactions (journal and fsync off while loading),
+so memory stays bounded by one batch plus the running aggregate cube. The
+route index and the chatbot's summary tables are built once after the load,
+from that cube rather than by re-scanning the table, and the finished file is
+renamed over the old one.
+
+    python convert_to_sqlite.py flights_2015_lite.parquet [more.parquet ...] --db flights.db
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from sqlite_store import CUBE_COLUMNS, prepare_database
+
+CUBE_KEYS = CUBE_COLUMNS[:5]
+
+
+def sqlite_type(arrow_type) -> str:
+    if pa.types.is_integer(arrow_type) or pa.types.is_boolean(arrow_type):
+        return "INTEGER"
+    if pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+        return "REAL"
+    return "TEXT"
+
+
+def create_table(conn: sqlite3.Connection, schema: pa.Schema):
+    cols = ", ".join(f'"{f.name}" {sqlite_type(f.type)}' for f in schema)
+    conn.execute("DROP TABLE IF EXISTS flights")
+    conn.execute(f"CREATE TABLE flights ({cols}) STRICT")
+
+
+def batch_cube(batch: pa.RecordBatch) -> pa.Table:
+    """Partial flight_cube of one batch (same sums as sqlite_store.CUBE_FROM_FLIGHTS)."""
+    sched = pc.cast(batch.column("SCHEDULED_DEPARTURE"), pa.int64(), safe=False)
+    table = pa.table({
+        "ORIGIN_AIRPORT": batch.column("ORIGIN_AIRPORT"),
+        "DESTINATION_AIRPORT": batch.column("DESTINATION_AIRPORT"),
+        "MONTH": batch.column("MONTH"),
+        "AIRLINE": batch.column("AIRLINE"),
+        "SCHED_HOUR": pc.divide(sched, 100),
+        "delayed": pc.cast(pc.fill_null(pc.greater(batch.column("ARRIVAL_DELAY"), 15), False), pa.int64()),
+        "distance": pc.cast(batch.column("DISTANCE"), pa.int64(), safe=False),
+    })
+    cube = table.group_by(CUBE_KEYS).aggregate(
+        [("delayed", "sum"), ("delayed", "count"), ("distance", "sum"), ("distance", "count"), ("distance", "max")])
+    return cube.select(CUBE_KEYS + ["delayed_sum", "delayed_count", "distance_sum", "distance_count", "distance_max"]) \
+               .rename_columns(CUBE_COLUMNS)
+
+
+def merge_cubes(cubes) -> pa.Table:
+    """Combine partial cubes into one: counts and sums add up, maxima take the max."""
+    table = pa.concat_tables(cubes)
+    merged = table.group_by(CUBE_KEYS).aggregate(
+        [("delayed", "sum"), ("flights", "sum"), ("distance_sum", "sum"), ("distance_n", "sum"),
+         ("distance_max", "max")])
+    return merged.select(CUBE_KEYS + ["delayed_sum", "flights_sum", "distance_sum_sum", "distance_n_sum",
+                                      "distance_max_max"]).rename_columns(CUBE_COLUMNS)
+
+
+def load_parquet(conn: sqlite3.Connection, path: str, columns, batch_size: int, cubes: list) -> int:
+    """Append one parquet file to ``flights`` batch by batch, collecting partial cubes; returns the row count."""
+    insert = f"INSERT INTO flights VALUES ({', '.join('?' * len(columns))})"
+    rows = 0
+    conn.execute("BEGIN")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns):
+        conn.executemany(insert, zip(*(col.to_pylist() for col in batch.columns)))
+        cubes.append(batch_cube(batch))
+        if len(cubes) >= 16:
+            cubes[:] = [merge_cubes(cubes)]  # keep the running aggregate bounded
+        rows += batch.num_rows
+    conn.execute("COMMIT")
+    return rows
+
+
+def convert(paths, db_path: str, batch_size: int = 100_000):
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    schema = pq.read_schema(paths[0])
+    columns = schema.names
+
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
+    # Bulk-load settings: nothing to recover if the build dies, we just rerun it
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-262144")
+    conn.execute("PRAGMA threads=4")  # parallel sorter for the index build
+    create_table(conn, schema)
+
+    t0 = time.perf_counter()
+    cubes = []
+    rows = sum(load_parquet(conn, path, columns, batch_size, cubes) for path in paths)
+    cube = merge_cubes(cubes)
+    t1 = time.perf_counter()
+    # Route index + summary tables (rolled up from the cube), then WAL for the readers
+    conn.execute("BEGIN")
+    prepare_database(conn, cube_rows=zip(*(col.to_pylist() for col in cube.columns)))
+    conn.close()
+    t2 = time.perf_counter()
+
+    # Swap the finished file in; drop WAL/SHM files left by the previous database
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    os.replace(tmp_path, db_path)
+    print(f"✅ {db_path} created successfully: {rows} rows loaded in {t1 - t0:.1f}s, "
+          f"indexes and summaries in {t2 - t1:.1f}s")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert flights parquet file(s) into the chatbot's SQLite database.")
+    ap.add_argument("parquet", nargs="*", default=["flights_2015_lite.parquet"])
+    ap.add_argument("--db", default="flights.db")
+    ap.add_argument("--batch-size", type=int, default=100_000)
+    args = ap.parse_args()
+    convert(args.parquet, args.db, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""Offline build of the chatbot's lookup artifact.
+
+Backoff tables, valid airline/airport codes, the analytics aggregates, route
+mean distances and the route-partitioned tables behind the route handlers are
+computed once from the parquet and written as plain .npy arrays plus a JSON
+manifest under ``<root>/<sha256 of the parquet>/``. The server memory-maps
+them at startup instead of re-running the groupbys, and only rebuilds when the
+parquet's hash changes.
+
+    python index_artifact.py --data flights_2015_lite.parquet --out artifacts/index
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from backoff import BackoffIndex
+
+FORMAT_VERSION = 3
+MANIFEST = "manifest.json"
+MONTH_SLOTS = 16  # route partitions are keyed route_code * MONTH_SLOTS + month
+
+LOW_COST_AIRLINES = {"WN", "NK", "B6"}  # Southwest, Spirit, JetBlue (heuristic)
+
+
+# Load-time schema: only the columns the chatbot reads, in the narrowest dtype that holds them.
+# Origin and destination share one airport category set, so their codes are comparable.
+SCHEMA = {
+    "MONTH": "int8",
+    "AIRLINE": "category",
+    "ORIGIN_AIRPORT": "airport",
+    "DESTINATION_AIRPORT": "airport",
+    "SCHEDULED_DEPARTURE": "int16",
+    "ARRIVAL_DELAY": "float32",
+    "DISTANCE": "int16",
+}
+
+
+def add_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Columns every lookup is keyed on: the 15-minute delay flag and departure hour."""
+    df["DELAYED_15"] = (df["ARRIVAL_DELAY"] > 15).astype(np.uint8)
+    hour = (df["SCHEDULED_DEPARTURE"] // 100).clip(0, 23)
+    df["DEP_HOUR"] = hour if hour.isna().any() else hour.astype(np.int8)
+    return df
+
+
+def load_flights(path: str) -> pd.DataFrame:
+    """Read the parquet into the compact SCHEMA and add the derived columns."""
+    df = pd.read_parquet(path, columns=list(SCHEMA))
+    airports = pd.CategoricalDtype(sorted(
+        set(df["ORIGIN_AIRPORT"].dropna().unique()) | set(df["DESTINATION_AIRPORT"].dropna().unique())))
+    for col, dtype in SCHEMA.items():
+        if dtype == "airport":
+            df[col] = df[col].astype(airports)
+        elif dtype.startswith("int") and df[col].isna().any():
+            df[col] = df[col].astype(np.float32)  # integer column with gaps: keep the NaNs
+        else:
+            df[col] = df[col].astype(dtype)
+    return add_derived_columns(df)
+
+
+def source_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def group_counts(codes: np.ndarray, delayed: np.ndarray, size: int):
+    """Delayed-flight and flight counts per code (codes < 0 are skipped)."""
+    valid = codes >= 0
+    flights = np.bincount(codes[valid], minlength=size)
+    late = np.bincount(codes[valid], weights=delayed[valid], minlength=size)
+    return late.astype(np.int64), flights.astype(np.int64)
+
+
+def build_arrays(df: pd.DataFrame):
+    """All artifact arrays plus the manifest fields describing them."""
+    backoff = BackoffIndex.build(df)
+    codes = backoff.encode(df["AIRLINE"], df["ORIGIN_AIRPORT"], df["DESTINATION_AIRPORT"],
+                           df["MONTH"], df["DEP_HOUR"])
+    delayed = df["DELAYED_15"].to_numpy(dtype=np.int64)
+    n_airports = len(backoff.airports)
+
+    arrays = {"backoff_keys": backoff.keys, "backoff_values": backoff.values}
+    for name, col, size in [("origin", "ORIGIN_AIRPORT", n_airports),
+                            ("airline", "AIRLINE", len(backoff.airlines)),
+                            ("hour", "DEP_HOUR", 24)]:
+        arrays[f"{name}_delayed"], arrays[f"{name}_flights"] = group_counts(codes[col], delayed, size)
+
+    # Routes are keyed origin_code * n_airports + dest_code
+    origin, dest = codes["ORIGIN_AIRPORT"], codes["DESTINATION_AIRPORT"]
+    route = np.where((origin >= 0) & (dest >= 0), origin * n_airports + dest, -1)
+    route_keys, route_codes = np.unique(route[route >= 0], return_inverse=True)
+    routed = delayed[route >= 0]
+    arrays["route_keys"] = route_keys.astype(np.int64)
+    arrays["route_delayed"], arrays["route_flights"] = group_counts(route_codes, routed, len(route_keys))
+
+    # Mean DISTANCE per route (NaN if none is known), for the model's distance feature
+    distance = df["DISTANCE"].to_numpy(dtype=np.float64)[route >= 0]
+    known = ~np.isnan(distance)
+    total = np.bincount(route_codes[known], weights=distance[known], minlength=len(route_keys))
+    counts = np.bincount(route_codes[known], minlength=len(route_keys))
+    with np.errstate(invalid="ignore"):
+        arrays["route_distance"] = total / counts
+
+    arrays.update(build_route_arrays(df, codes, backoff.airlines, n_airports))
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "rows": int(len(df)),
+        "global_rate": float(backoff.global_rate),
+        "mean_distance": float(np.nanmean(df["DISTANCE"].to_numpy(dtype=np.float64))),
+        "airlines": [str(a) for a in backoff.airlines],
+        "airports": [str(a) for a in backoff.airports],
+    }
+    return arrays, manifest
+
+
+def build_route_arrays(df: pd.DataFrame, codes, airlines, n_airports: int):
+    """Route/route-month partitions behind the alternatives, next-flights and cheap handlers.
+
+    Every table is sorted by its partition key so a handler finds its rows
+    with two ``searchsorted`` calls on the ``*_part`` array.
+    """
+    origin, dest, airline = codes["ORIGIN_AIRPORT"], codes["DESTINATION_AIRPORT"], codes["AIRLINE"]
+    route = np.where((origin >= 0) & (dest >= 0), origin * n_airports + dest, -1)
+    month = codes["MONTH"]
+    sched = df["SCHEDULED_DEPARTURE"].to_numpy(dtype=float)
+    has_sched = ~np.isnan(sched)
+    hhmm = np.where(has_sched, sched, 0).astype(np.int64)
+    part = route * MONTH_SLOTS + month
+    in_month = (route >= 0) & (month >= 0) & (airline >= 0) & has_sched
+    arrays = {}
+
+    # Alternatives: delayed/flight counts per (route, month, airline, departure hour)
+    alt = (pd.DataFrame({"part": part[in_month], "airline": airline[in_month],
+                         "hour": np.clip(hhmm[in_month] // 100, 0, 23),
+                         "delayed": df["DELAYED_15"].to_numpy()[in_month]})
+             .groupby(["part", "airline", "hour"])["delayed"].agg(["sum", "size"])
+             .reset_index())
+    arrays["alt_part"] = alt["part"].to_numpy(dtype=np.int64)
+    arrays["alt_airline"] = alt["airline"].to_numpy(dtype=np.int16)
+    arrays["alt_hour"] = alt["hour"].to_numpy(dtype=np.int8)
+    arrays["alt_delayed"] = alt["sum"].to_numpy(dtype=np.int32)
+    arrays["alt_flights"] = alt["size"].to_numpy(dtype=np.int32)
+
+    # Next departures: every scheduled departure per (route, month), sorted by minute of day
+    minutes = (hhmm // 100) * 60 + hhmm % 100
+    rows = np.flatnonzero(in_month)
+    rows = rows[np.lexsort((minutes[rows], part[rows]))]
+    arrays["dep_part"] = part[rows]
+    arrays["dep_min"] = minutes[rows].astype(np.int16)
+    arrays["dep_hhmm"] = hhmm[rows].astype(np.int16)
+    arrays["dep_airline"] = airline[rows].astype(np.int16)
+
+    # Cheap heuristic: mean distance / fare score per (route, airline, hour), pre-ranked per route
+    distance = df["DISTANCE"].to_numpy(dtype=float)
+    ok = (route >= 0) & (airline >= 0) & has_sched & ~np.isnan(distance)
+    sub = pd.DataFrame({"route": route[ok], "airline": airline[ok],
+                        "hour": hhmm[ok] // 100, "distance": distance[ok]})
+    max_distance = sub.groupby("route")["distance"].transform("max").clip(lower=1)
+    full_fare = ~np.isin(np.asarray(airlines, dtype=object)[sub["airline"]], list(LOW_COST_AIRLINES))
+    sub["score"] = (sub["distance"] / max_distance) + full_fare.astype(int) * 0.2
+    cheap = (sub.groupby(["route", "airline", "hour"])
+                .agg(avg_distance=("distance", "mean"), score=("score", "mean"), count=("distance", "size"))
+                .reset_index())
+    cheap = cheap.iloc[np.lexsort((cheap["avg_distance"], cheap["score"], cheap["route"]))]
+    arrays["cheap_part"] = cheap["route"].to_numpy(dtype=np.int64)
+    arrays["cheap_airline"] = cheap["airline"].to_numpy(dtype=np.int16)
+    arrays["cheap_hour"] = cheap["hour"].to_numpy(dtype=np.int16)
+    arrays["cheap_avg_distance"] = cheap["avg_distance"].to_numpy(dtype=np.float64)
+    arrays["cheap_score"] = cheap["score"].to_numpy(dtype=np.float64)
+    arrays["cheap_count"] = cheap["count"].to_numpy(dtype=np.int32)
+    return arrays
+
+
+class RouteIndex:
+    """Route-partitioned views over the artifact's alt_*, dep_* and cheap_* tables."""
+
+    def __init__(self, arrays, airlines, airports):
+        self.arrays = arrays
+        self.airlines = np.asarray(airlines, dtype=object)
+        self.airport_codes = {a: i for i, a in enumerate(airports)}
+        self.n_airports = len(airports)
+
+    def route_code(self, origin, dest) -> int:
+        o, d = self.airport_codes.get(origin, -1), self.airport_codes.get(dest, -1)
+        return o * self.n_airports + d if o >= 0 and d >= 0 else -1
+
+    def month_key(self, origin, dest, month) -> int:
+        route = self.route_code(origin, dest)
+        try:
+            month = int(month)
+        except (TypeError, ValueError):
+            return -1
+        return route * MONTH_SLOTS + month if route >= 0 and 0 <= month < MONTH_SLOTS else -1
+
+    def partition(self, table: str, key: int) -> slice:
+        keys = self.arrays[f"{table}_part"]
+        if key < 0:
+            return slice(0, 0)
+        return slice(int(np.searchsorted(keys, key, "left")), int(np.searchsorted(keys, key, "right")))
+
+    def alternatives(self, origin, dest, month) -> pd.DataFrame:
+        """Delay rate and sample size per (AIRLINE, DEPARTURE_HOUR) for one route and month."""
+        rows = self.partition("alt", self.month_key(origin, dest, month))
+        delayed = np.asarray(self.arrays["alt_delayed"][rows], dtype=np.int64)
+        flights = np.asarray(self.arrays["alt_flights"][rows], dtype=np.int64)
+        return pd.DataFrame({
+            "AIRLINE": self.airlines[self.arrays["alt_airline"][rows]],
+            "DEPARTURE_HOUR": np.asarray(self.arrays["alt_hour"][rows], dtype=np.int64),
+            "delay_rate": delayed / np.maximum(flights, 1),
+            "flights": flights,
+        })
+
+    def departures(self, origin, dest, month):
+        """(minute of day, HHMM, airline) arrays of one route and month, sorted by minute."""
+        rows = self.partition("dep", self.month_key(origin, dest, month))
+        return (self.arrays["dep_min"][rows], self.arrays["dep_hhmm"][rows],
+                self.airlines[self.arrays["dep_airline"][rows]])
+
+    def next_departures(self, origin, dest, month, after_minutes: int, limit: int = 8):
+        """Up to ``limit`` (airline, HHMM) departures at or after ``after_minutes``; None if the route-month is empty."""
+        dep_min, dep_hhmm, airlines = self.departures(origin, dest, month)
+        if not len(dep_min):
+            return None
+        start = int(np.searchsorted(dep_min, after_minutes))
+        return list(zip(airlines[start:start + limit], dep_hhmm[start:start + limit].tolist()))
+
+    def cheapest(self, origin, dest, top_n: int = 5) -> pd.DataFrame:
+        """Best (AIRLINE, HOUR) groups of a route by fare score, then mean distance."""
+        rows = self.partition("cheap", self.route_code(origin, dest))
+        rows = slice(rows.start, min(rows.stop, rows.start + top_n))
+        return pd.DataFrame({
+            "AIRLINE": self.airlines[self.arrays["cheap_airline"][rows]],
+            "HOUR": np.asarray(self.arrays["cheap_hour"][rows], dtype=np.int64),
+            "avg_distance": np.asarray(self.arrays["cheap_avg_distance"][rows]),
+            "score": np.asarray(self.arrays["cheap_score"][rows]),
+            "count": np.asarray(self.arrays["cheap_count"][rows], dtype=np.int64),
+        })
+
+
+def build_artifact(data_path: str, root: str, digest: str = None) -> str:
+    """Build the artifact for ``data_path`` and return its directory."""
+    digest = digest or source_hash(data_path)
+    target = os.path.join(root, digest)
+    df = load_flights(data_path)
+    arrays, manifest = build_arrays(df)
+    manifest.update(source=os.path.basename(data_path), sha256=digest, built_at=time.time())
+
+    # Write into a temp dir and rename it into place, so concurrent workers never see a partial build
+    os.makedirs(root, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=root, prefix=".build-")
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(arr))
+        with open(os.path.join(tmp, MANIFEST), "w") as f:
+            json.dump(manifest, f)
+        os.rename(tmp, target)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.exists(os.path.join(target, MANIFEST)):
+            raise
+    return target
+
+
+class LookupArtifact:
+    """Memory-mapped view of one built artifact directory."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: artifact format {self.manifest.get('format')} != {FORMAT_VERSION}")
+        self.path = path
+        self.arrays = {
+            name[:-4]: np.load(os.path.join(path, name), mmap_mode="r")
+            for name in os.listdir(path) if name.endswith(".npy")
+        }
+        self.airlines = self.manifest["airlines"]
+        self.airports = self.manifest["airports"]
+        self.backoff = BackoffIndex(self.airlines, self.airports, self.arrays["backoff_keys"],
+                                    self.arrays["backoff_values"], self.manifest["global_rate"])
+        self.routes = RouteIndex(self.arrays, self.airlines, self.airports)
+
+    def route_distance(self, origin, dest) -> float:
+        """Mean DISTANCE of the route, or of all flights when the route is unknown."""
+        route = self.routes.route_code(origin, dest)
+        keys = self.arrays["route_keys"]
+        i = int(np.searchsorted(keys, route))
+        if route >= 0 and i < len(keys) and keys[i] == route and not np.isnan(self.arrays["route_distance"][i]):
+            return float(self.arrays["route_distance"][i])
+        return self.manifest["mean_distance"]
+
+    def delay_rates(self, name: str) -> pd.Series:
+        """Mean DELAYED_15 per origin/airline/hour/route, ordered like the equivalent groupby."""
+        delayed = np.asarray(self.arrays[f"{name}_delayed"], dtype=float)
+        flights = np.asarray(self.arrays[f"{name}_flights"])
+        if name == "route":
+            # Labels are only materialized for the routes that exist, from their two codes
+            n = len(self.airports)
+            keys = np.asarray(self.arrays["route_keys"])
+            labels = [f"{self.airports[k // n]}→{self.airports[k % n]}" for k in keys.tolist()]
+            return pd.Series(delayed / flights, index=labels).sort_index()
+        labels = {"origin": self.airports, "airline": self.airlines, "hour": range(len(flights))}[name]
+        seen = flights > 0
+        return pd.Series(delayed[seen] / flights[seen], index=np.asarray(list(labels))[seen])
+
+
+def prune(root: str, keep: str):
+    """Remove artifact versions other than ``keep``."""
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) and name != os.path.basename(keep) and not name.startswith("."):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_artifact(data_path: str, root: str, keep_old: bool = False) -> LookupArtifact:
+    """Open the artifact matching the parquet's current hash, building it if needed."""
+    digest = source_hash(data_path)
+    target = os.path.join(root, digest)
+    if os.path.exists(os.path.join(target, MANIFEST)):
+        try:
+            return LookupArtifact(target)
+        except (ValueError, KeyError):
+            shutil.rmtree(target, ignore_errors=True)  # stale format: rebuild below
+    artifact = LookupArtifact(build_artifact(data_path, root, digest))
+    if not keep_old:
+        prune(root, artifact.path)
+    return artifact
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build the chatbot lookup artifact from the flights parquet.")
+    ap.add_argument("--data", default="flights_2015_lite.parquet")
+    ap.add_argument("--out", default=os.path.join("artifacts", "index"))
+    ap.add_argument("--force", action="store_true", help="rebuild even if the parquet hash is unchanged")
+    ap.add_argument("--keep-old", action="store_true", help="keep artifacts built from older parquet versions")
+    args = ap.parse_args()
+
+    digest = source_hash(args.data)
+    target = os.path.join(args.out, digest)
+    if args.force and os.path.isdir(target):
+        shutil.rmtree(target)
+    t0 = time.perf_counter()
+    artifact = load_artifact(args.data, args.out, keep_old=args.keep_old)
+    print(f"✅ {artifact.path}: {artifact.manifest['rows']} rows, "
+          f"{len(artifact.arrays['backoff_keys'])} backoff keys ({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Async LLM fallback for UNKNOWN-intent messages.
+
+Providers are plain HTTPS calls over one pooled ``httpx.AsyncClient``, each
+with its own deadline. They are tried in order (OpenAI, then Gemini), or
+hedged: the next provider is started if the current one hasn't answered
+within ``hedge_after`` seconds, and the first good reply wins. Replies are
+cached by normalized prompt. Base URLs come from the environment, so the
+whole layer can be pointed at a local stub server.
+"""
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+
+import httpx
+
+SYSTEM_PROMPT = "You are a helpful flight assistant chatbot."
+
+
+class ProviderError(Exception):
+    """Every configured provider failed or timed out."""
+
+
+class OpenAIProvider:
+    name = "OpenAI"
+
+    def __init__(self, api_key, base_url="https://api.openai.com/v1", model="gpt-4o-mini", timeout=15.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+
+    async def complete(self, http: httpx.AsyncClient, prompt: str) -> str:
+        resp = await http.post(
+            f"{self.base_url}/chat/completions",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json={"model": self.model,
+                  "messages": [{"role": "system", "content": SYSTEM_PROMPT},
+                               {"role": "user", "content": prompt}]},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()["choices"][0]["message"]["content"]
+
+
+class GeminiProvider:
+    name = "Gemini"
+
+    def __init__(self, api_key, base_url="https://generativelanguage.googleapis.com/v1beta",
+                 model="gemini-1.5-flash", timeout=15.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+
+    async def complete(self, http: httpx.AsyncClient, prompt: str) -> str:
+        resp = await http.post(
+            f"{self.base_url}/models/{self.model}:generateContent",
+            headers={"x-goog-api-key": self.api_key},
+            json={"contents": [{"parts": [{"text": prompt}]}]},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Cache key for a prompt: case- and whitespace-insensitive."""
+    return re.sub(r"\s+", " ", prompt).strip().lower()
+
+
+class ReplyCache:
+    """Bounded LRU of ``(reply, provider)`` per normalized prompt; entries expire after ``ttl`` seconds."""
+
+    def __init__(self, max_size=1024, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key, reply):
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (reply, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class LLMClient:
+    """Pooled, deadline-bound, optionally hedged LLM calls with a reply cache.
+
+    ``max_concurrency`` caps in-flight LLM requests so a burst of UNKNOWN
+    messages queues here instead of tying up the server.
+    """
+
+    def __init__(self, providers, hedge_after=None, max_concurrency=16, max_connections=20,
+                 cache_size=1024, cache_ttl=3600):
+        self.providers = list(providers)
+        self.hedge_after = hedge_after
+        self.max_concurrency = max_concurrency
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.cache = ReplyCache(max_size=cache_size, ttl=cache_ttl)
+        self._http = None
+        self._slots = None
+        self._loop = None
+
+    async def _bind(self):
+        # Pooled connections and the semaphore belong to the running event loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            previous = self._http
+            # Deadlines are per provider (asyncio.wait_for plus the request timeout), not httpx's 5s default
+            self._loop, self._http = loop, httpx.AsyncClient(limits=self.limits, timeout=None)
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            if previous is not None:
+                await self._close(previous)
+        return self._http
+
+    @staticmethod
+    async def _close(http):
+        try:
+            await http.aclose()
+        except (RuntimeError, OSError):
+            pass  # connections opened on an event loop that is gone can't be shut down cleanly
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._close(self._http)
+            self._http, self._loop = None, None
+
+    async def ask(self, prompt: str):
+        """Return ``(reply, provider)``; errors come back as ``("LLM error: ...", "Error")``."""
+        key = normalize_prompt(prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if not self.providers:
+            return "LLM error: no LLM provider configured", "Error"
+
+        http = await self._bind()
+        async with self._slots:
+            try:
+                if self.hedge_after is None:
+                    result = await self._sequential(http, prompt)
+                else:
+                    result = await self._hedged(http, prompt)
+            except ProviderError as e:
+                return f"LLM error: {e}", "Error"
+        self.cache.set(key, result)
+        return result
+
+    async def _call(self, provider, http, prompt):
+        text = await asyncio.wait_for(provider.complete(http, prompt), provider.timeout)
+        return text, provider.name
+
+    async def _sequential(self, http, prompt):
+        errors = []
+        for provider in self.providers:
+            try:
+                return await self._call(provider, http, prompt)
+            except Exception as e:
+                print(f"{provider.name} failed:", repr(e))
+                errors.append(f"{provider.name}: {e!r}")
+        raise ProviderError("; ".join(errors))
+
+    async def _hedged(self, http, prompt):
+        errors, pending = [], set()
+        try:
+            for i, provider in enumerate(self.providers):
+                pending.add(asyncio.create_task(self._call(provider, http, prompt)))
+                last = i == len(self.providers) - 1
+                # Wait for a winner; start the next provider after hedge_after or as soon as all in flight failed
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, timeout=None if last else self.hedge_after,
+                        return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        break
+                    for task in done:
+                        if task.exception() is None:
+                            return task.result()
+                        errors.append(repr(task.exception()))
+        finally:
+            for task in pending:
+                task.cancel()
+        raise ProviderError("; ".join(errors))
+
+
+def client_from_env() -> LLMClient:
+    """LLMClient configured from OPENAI_*/GEMINI_*/LLM_* environment variables."""
+    providers = []
+    if os.getenv("OPENAI_API_KEY"):
+        providers.append(OpenAIProvider(
+            os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL") or "https://api.openai.com/v1",
+            timeout=float(os.getenv("LLM_OPENAI_TIMEOUT", "15")),
+        ))
+    if os.getenv("GEMINI_API_KEY"):
+        providers.append(GeminiProvider(
+            os.getenv("GEMINI_API_KEY"),
+            base_url=os.getenv("GEMINI_BASE_URL") or "https://generativelanguage.googleapis.com/v1beta",
+            timeout=float(os.getenv("LLM_GEMINI_TIMEOUT", "15")),
+        ))
+    hedge_ms = os.getenv("LLM_HEDGE_MS")
+    return LLMClient(
+        providers,
+        hedge_after=float(hedge_ms) / 1000.0 if hedge_ms else None,
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+        cache_size=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+        cache_ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+    )
@@ -0,0 +1,283 @@
+"""SQLite storage backend for the chatbot (CHATBOT_BACKEND=sqlite).
+
+``prepare_database`` adds the composite route index and the summary tables
+to a flights.db produced by convert_to_sqlite.py and switches it to WAL.
+``SqliteStore`` serves the same lookups as the in-memory artifact
+(backoff, route handlers, analytics, route distance) from pooled read-only
+connections, so a worker holds no flight rows in RAM.
+"""
+import os
+import queue
+import sqlite3
+from contextlib import contextmanager
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from backoff import TIERS
+from index_artifact import LOW_COST_AIRLINES
+
+DELAYED = "IFNULL(ARRIVAL_DELAY > 15, 0)"
+DEP_HOUR = "MIN(MAX(SCHED_HOUR, 0), 23)"  # over flight_cube
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_flights_route_month "
+    "ON flights (ORIGIN_AIRPORT, DESTINATION_AIRPORT, MONTH, SCHEDULED_DEPARTURE)",
+]
+
+
+# Per (route, month, airline, scheduled hour) integer sums; every summary table is rolled up from it.
+# SCHED_HOUR is the raw SCHEDULED_DEPARTURE // 100 (the cheap heuristic groups on it unclipped).
+CUBE_COLUMNS = ["ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "MONTH", "AIRLINE", "SCHED_HOUR",
+                "delayed", "flights", "distance_sum", "distance_n", "distance_max"]
+CUBE_DDL = """CREATE TEMP TABLE flight_cube (
+    ORIGIN_AIRPORT TEXT, DESTINATION_AIRPORT TEXT, MONTH INTEGER, AIRLINE TEXT, SCHED_HOUR INTEGER,
+    delayed INTEGER, flights INTEGER, distance_sum INTEGER, distance_n INTEGER, distance_max INTEGER)"""
+CUBE_FROM_FLIGHTS = f"""INSERT INTO flight_cube SELECT
+    ORIGIN_AIRPORT, DESTINATION_AIRPORT, MONTH, AIRLINE, CAST(SCHEDULED_DEPARTURE AS INTEGER) / 100,
+    SUM({DELAYED}), COUNT(*), SUM(DISTANCE), COUNT(DISTANCE), MAX(DISTANCE)
+  FROM flights GROUP BY 1, 2, 3, 4, 5"""
+
+
+def summary_statements():
+    """DDL for the summary tables, rolled up from the temp ``flight_cube``."""
+    low_cost = ", ".join(f"'{a}'" for a in sorted(LOW_COST_AIRLINES))
+    stmts = [
+        """CREATE TABLE chatbot_meta AS SELECT
+              CAST(SUM(delayed) AS REAL) / SUM(flights) AS global_rate,
+              CAST(SUM(distance_sum) AS REAL) / SUM(distance_n) AS mean_distance
+            FROM flight_cube""",
+        """CREATE TABLE origin_stats AS SELECT ORIGIN_AIRPORT, SUM(delayed) AS delayed, SUM(flights) AS flights
+            FROM flight_cube WHERE ORIGIN_AIRPORT IS NOT NULL GROUP BY ORIGIN_AIRPORT""",
+        """CREATE TABLE airline_stats AS SELECT AIRLINE, SUM(delayed) AS delayed, SUM(flights) AS flights
+            FROM flight_cube WHERE AIRLINE IS NOT NULL GROUP BY AIRLINE""",
+        f"""CREATE TABLE hour_stats AS SELECT {DEP_HOUR} AS DEP_HOUR, SUM(delayed) AS delayed, SUM(flights) AS flights
+            FROM flight_cube WHERE SCHED_HOUR IS NOT NULL GROUP BY 1""",
+        """CREATE TABLE route_stats (
+              ORIGIN_AIRPORT TEXT, DESTINATION_AIRPORT TEXT, delayed INTEGER, flights INTEGER,
+              distance_sum REAL, distance_n INTEGER,
+              PRIMARY KEY (ORIGIN_AIRPORT, DESTINATION_AIRPORT)) WITHOUT ROWID""",
+        """INSERT INTO route_stats SELECT ORIGIN_AIRPORT, DESTINATION_AIRPORT, SUM(delayed), SUM(flights),
+              SUM(distance_sum), SUM(distance_n)
+            FROM flight_cube WHERE ORIGIN_AIRPORT IS NOT NULL AND DESTINATION_AIRPORT IS NOT NULL GROUP BY 1, 2""",
+        # Alternatives: delay rate + sample size per (route, month, airline, hour)
+        """CREATE TABLE route_month_stats (
+              ORIGIN_AIRPORT TEXT, DESTINATION_AIRPORT TEXT, MONTH INTEGER, AIRLINE TEXT, DEP_HOUR INTEGER,
+              delayed INTEGER, flights INTEGER,
+              PRIMARY KEY (ORIGIN_AIRPORT, DESTINATION_AIRPORT, MONTH, AIRLINE, DEP_HOUR)) WITHOUT ROWID""",
+        f"""INSERT INTO route_month_stats SELECT ORIGIN_AIRPORT, DESTINATION_AIRPORT, MONTH, AIRLINE, {DEP_HOUR},
+              SUM(delayed), SUM(flights)
+            FROM flight_cube
+            WHERE ORIGIN_AIRPORT IS NOT NULL AND DESTINATION_AIRPORT IS NOT NULL AND MONTH IS NOT NULL
+              AND AIRLINE IS NOT NULL AND SCHED_HOUR IS NOT NULL
+            GROUP BY 1, 2, 3, 4, 5""",
+        # Cheap heuristic: mean of distance / route max distance, +0.2 for full-fare carriers,
+        # per (route, airline, hour); the mean of the ratio is sum(distance) / max / n
+        f"""CREATE TABLE route_cheap AS
+            WITH g AS (
+              SELECT ORIGIN_AIRPORT, DESTINATION_AIRPORT, AIRLINE, SCHED_HOUR AS HOUR,
+                     SUM(distance_sum) AS s, SUM(distance_n) AS n, MAX(distance_max) AS mx
+              FROM flight_cube
+              WHERE ORIGIN_AIRPORT IS NOT NULL AND DESTINATION_AIRPORT IS NOT NULL AND AIRLINE IS NOT NULL
+                AND SCHED_HOUR IS NOT NULL AND distance_n > 0
+              GROUP BY 1, 2, 3, 4),
+            r AS (SELECT ORIGIN_AIRPORT, DESTINATION_AIRPORT, MAX(MAX(mx), 1) AS m FROM g GROUP BY 1, 2)
+            SELECT g.ORIGIN_AIRPORT, g.DESTINATION_AIRPORT, g.AIRLINE, g.HOUR,
+                   CAST(g.s AS REAL) / g.n AS avg_distance,
+                   CAST(g.s AS REAL) / r.m / g.n + (g.AIRLINE NOT IN ({low_cost})) * 0.2 AS score,
+                   g.n AS count
+            FROM g JOIN r USING (ORIGIN_AIRPORT, DESTINATION_AIRPORT)""",
+        "CREATE INDEX idx_route_cheap ON route_cheap (ORIGIN_AIRPORT, DESTINATION_AIRPORT, score, avg_distance)",
+    ]
+    # Backoff tiers g1..g7, one WITHOUT ROWID table each keyed on the tier's columns
+    exprs = {"DEP_HOUR": DEP_HOUR}
+    sources = {"DEP_HOUR": "SCHED_HOUR"}
+    for i, fields in enumerate(TIERS, start=1):
+        cols = ", ".join(fields)
+        decl = ", ".join(f"{f} {'TEXT' if f in ('AIRLINE', 'ORIGIN_AIRPORT', 'DESTINATION_AIRPORT') else 'INTEGER'}"
+                         for f in fields)
+        select = ", ".join(exprs.get(f, f) for f in fields)
+        not_null = " AND ".join(f"{sources.get(f, f)} IS NOT NULL" for f in fields)
+        groups = ", ".join(str(n) for n in range(1, len(fields) + 1))
+        stmts.append(f"CREATE TABLE backoff_g{i} ({decl}, rate REAL, PRIMARY KEY ({cols})) WITHOUT ROWID")
+        stmts.append(f"""INSERT INTO backoff_g{i} SELECT {select}, CAST(SUM(delayed) AS REAL) / SUM(flights)
+                         FROM flight_cube WHERE {not_null} GROUP BY {groups}""")
+    return stmts
+
+
+SUMMARY_TABLES = ["chatbot_meta", "origin_stats", "airline_stats", "hour_stats", "route_stats",
+                  "route_month_stats", "route_cheap"] + [f"backoff_g{i}" for i in range(1, len(TIERS) + 1)]
+
+
+def prepare_database(conn: sqlite3.Connection, cube_rows=None):
+    """Build the route index and (re)build every summary table, then switch the file to WAL.
+
+    ``cube_rows`` are pre-aggregated CUBE_COLUMNS rows (convert_to_sqlite.py
+    computes them while streaming); without them the cube is grouped from
+    ``flights`` in SQL.
+    """
+    for stmt in INDEXES:
+        conn.execute(stmt)
+    for table in SUMMARY_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute("DROP TABLE IF EXISTS temp.flight_cube")
+    conn.execute(CUBE_DDL)
+    if cube_rows is None:
+        conn.execute(CUBE_FROM_FLIGHTS)
+    else:
+        conn.executemany(f"INSERT INTO flight_cube VALUES ({', '.join('?' * len(CUBE_COLUMNS))})", cube_rows)
+    for stmt in summary_statements():
+        conn.execute(stmt)
+    conn.execute("DROP TABLE temp.flight_cube")
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA journal_mode=WAL")
+
+
+class ConnectionPool:
+    """Read-only connections handed out one per caller and reused."""
+
+    def __init__(self, path: str, size: int = 8):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+
+    def _connect(self):
+        conn = sqlite3.connect(f"file:{quote(os.path.abspath(self.path))}?mode=ro", uri=True,
+                               check_same_thread=False)
+        conn.execute("PRAGMA query_only=ON")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-16384")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if self._idle.qsize() < self.size:
+                self._idle.put(conn)
+            else:
+                conn.close()
+
+    def query(self, sql: str, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+
+class SqliteBackoff:
+    """g1..g7 backoff chain resolved with one UNION ALL query over the tier tables."""
+
+    def __init__(self, pool: ConnectionPool, global_rate: float):
+        self.pool = pool
+        self.global_rate = float(global_rate)
+
+    def lookup(self, airline, origin, dest, month, dep_hour) -> float:
+        values = {"AIRLINE": airline, "ORIGIN_AIRPORT": origin, "DESTINATION_AIRPORT": dest,
+                  "MONTH": _as_int(month), "DEP_HOUR": _as_int(dep_hour)}
+        parts, params = [], []
+        for i, fields in enumerate(TIERS, start=1):
+            if any(values[f] is None for f in fields):
+                continue
+            where = " AND ".join(f"{f} = ?" for f in fields)
+            parts.append(f"SELECT {i} AS tier, rate FROM backoff_g{i} WHERE {where}")
+            params.extend(values[f] for f in fields)
+        if parts:
+            rows = self.pool.query(" UNION ALL ".join(parts) + " ORDER BY tier LIMIT 1", params)
+            if rows:
+                return float(rows[0][1])
+        return self.global_rate
+
+    def lookup_many(self, airlines, origins, destinations, months, hours) -> np.ndarray:
+        return np.array([self.lookup(*row) for row in zip(airlines, origins, destinations, months, hours)],
+                        dtype=float)
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class SqliteRoutes:
+    """Route handler lookups (same interface as index_artifact.RouteIndex) over SQLite."""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    def alternatives(self, origin, dest, month) -> pd.DataFrame:
+        rows = self.pool.query(
+            "SELECT AIRLINE, DEP_HOUR, delayed, flights FROM route_month_stats "
+            "WHERE ORIGIN_AIRPORT = ? AND DESTINATION_AIRPORT = ? AND MONTH = ? ORDER BY AIRLINE, DEP_HOUR",
+            (origin, dest, _as_int(month)))
+        grp = pd.DataFrame(rows, columns=["AIRLINE", "DEPARTURE_HOUR", "delayed", "flights"])
+        return pd.DataFrame({
+            "AIRLINE": grp["AIRLINE"].astype(object),
+            "DEPARTURE_HOUR": grp["DEPARTURE_HOUR"].astype(np.int64),
+            "delay_rate": grp["delayed"].astype(float) / grp["flights"].clip(lower=1),
+            "flights": grp["flights"].astype(np.int64),
+        })
+
+    def next_departures(self, origin, dest, month, after_minutes: int, limit: int = 8):
+        """Up to ``limit`` (airline, HHMM) departures at or after ``after_minutes``; None if the route-month is empty."""
+        params = (origin, dest, _as_int(month))
+        where = "ORIGIN_AIRPORT = ? AND DESTINATION_AIRPORT = ? AND MONTH = ?"
+        with self.pool.connection() as conn:
+            if conn.execute(f"SELECT 1 FROM flights WHERE {where} LIMIT 1", params).fetchone() is None:
+                return None
+            rows = conn.execute(
+                f"SELECT AIRLINE, CAST(SCHEDULED_DEPARTURE AS INTEGER) FROM flights "
+                f"WHERE {where} AND SCHEDULED_DEPARTURE >= ? AND AIRLINE IS NOT NULL "
+                f"ORDER BY SCHEDULED_DEPARTURE LIMIT ?",
+                params + ((after_minutes // 60) * 100 + after_minutes % 60, limit)).fetchall()
+        return [(airline, int(hhmm)) for airline, hhmm in rows]
+
+    def cheapest(self, origin, dest, top_n: int = 5) -> pd.DataFrame:
+        rows = self.pool.query(
+            "SELECT AIRLINE, HOUR, avg_distance, score, count FROM route_cheap "
+            "WHERE ORIGIN_AIRPORT = ? AND DESTINATION_AIRPORT = ? "
+            "ORDER BY score, avg_distance, AIRLINE, HOUR LIMIT ?",
+            (origin, dest, top_n))
+        grp = pd.DataFrame(rows, columns=["AIRLINE", "HOUR", "avg_distance", "score", "count"])
+        return grp.astype({"AIRLINE": object, "HOUR": np.int64, "avg_distance": float,
+                           "score": float, "count": np.int64})
+
+
+class SqliteStore:
+    """Everything the chatbot looks up, served from an indexed flights.db."""
+
+    def __init__(self, path: str, pool_size: int = 8):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        global_rate, self.mean_distance = self.pool.query("SELECT global_rate, mean_distance FROM chatbot_meta")[0]
+        self.airlines = [r[0] for r in self.pool.query("SELECT AIRLINE FROM airline_stats ORDER BY AIRLINE")]
+        self.airports = [r[0] for r in self.pool.query(
+            "SELECT ORIGIN_AIRPORT FROM route_stats UNION SELECT DESTINATION_AIRPORT FROM route_stats ORDER BY 1")]
+        self.backoff = SqliteBackoff(self.pool, global_rate)
+        self.routes = SqliteRoutes(self.pool)
+
+    def delay_rates(self, name: str) -> pd.Series:
+        """Mean DELAYED_15 per origin/airline/hour/route, ordered like the equivalent groupby."""
+        if name == "route":
+            rows = self.pool.query("SELECT ORIGIN_AIRPORT || '→' || DESTINATION_AIRPORT, delayed, flights "
+                                   "FROM route_stats")
+        else:
+            table, col = {"origin": ("origin_stats", "ORIGIN_AIRPORT"), "airline": ("airline_stats", "AIRLINE"),
+                          "hour": ("hour_stats", "DEP_HOUR")}[name]
+            rows = self.pool.query(f"SELECT {col}, delayed, flights FROM {table}")
+        labels = [r[0] for r in rows]
+        rates = np.array([r[1] for r in rows], dtype=float) / np.array([r[2] for r in rows], dtype=float)
+        return pd.Series(rates, index=labels, dtype=float).sort_index()
+
+    def route_distance(self, origin, dest) -> float:
+        """Mean DISTANCE of the route, or of all flights when the route is unknown."""
+        rows = self.pool.query("SELECT distance_sum / distance_n FROM route_stats "
+                               "WHERE ORIGIN_AIRPORT = ? AND DESTINATION_AIRPORT = ? AND distance_n > 0",
+                               (origin, dest))
+        return float(rows[0][0]) if rows else float(self.mean_distance)
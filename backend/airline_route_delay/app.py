@@ -1,28 +1,120 @@
-from flask import Flask, request, jsonify
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import pandas as pd
+import instrumentation
+from instrumentation import stage, timed
+from stats_cube import FlightIndex, build_airline_stats, route_stats
 
 app = Flask(__name__)
 CORS(app)  # enable CORS so frontend can call APIs
 
+DATA_PATH = "unique_flights.csv"
+RELOAD_LOCK = threading.Lock()
+
+
+def build_options_payload(df):
+    """Dropdown options as ready-to-send JSON bytes plus their ETag."""
+    body = (app.json.dumps({
+        "airlines": sorted(df["AIRLINE"].dropna().unique().tolist()),
+        "origins": sorted(df["ORIGIN_AIRPORT"].dropna().unique().tolist()),
+        "destinations": sorted(df["DESTINATION_AIRPORT"].dropna().unique().tolist())
+    }) + "\n").encode()
+    return body, hashlib.sha1(body).hexdigest()
+
+
 # ========= Load dataset =========
-try:
-    df = pd.read_csv("unique_flights.csv")
-except Exception as e:
-    raise RuntimeError(f"Could not load dataset: {e}")
+class Dataset:
+    """Everything served from one load of unique_flights.csv, published as a whole.
+
+    Handlers read ``DATASET`` once per request and use only that object, so a
+    reload never mixes old and new data. Airline payloads are computed up
+    front; route payloads are computed from contiguous index slices on first
+    request and memoized with this load, so per-request cost does not grow
+    with the dataset.
+    """
+    __slots__ = ("mtime", "last_modified", "index", "airline_stats", "route_stats", "options_body", "options_etag")
+
+    def __init__(self, df, mtime):
+        self.mtime = mtime
+        self.last_modified = datetime.fromtimestamp(mtime, tz=timezone.utc)
+        self.index = FlightIndex(df)
+        self.airline_stats = build_airline_stats(df)
+        self.route_stats = {}
+        self.options_body, self.options_etag = build_options_payload(df)
+
+
+@timed("load_dataset")
+def load_dataset():
+    """Load the dataset and publish everything derived from it in one assignment."""
+    global DATASET
+    try:
+        mtime = os.path.getmtime(DATA_PATH)
+        new_df = pd.read_csv(DATA_PATH)
+    except Exception as e:
+        raise RuntimeError(f"Could not load dataset: {e}")
+    DATASET = Dataset(new_df, mtime)
+
+
+load_dataset()
+
+
+# ========= Metrics =========
+# Per-endpoint latency histograms; send X-Timing-Breakdown: 1 to get this request's stages as Server-Timing
+if instrumentation.ENABLED:
+    @app.before_request
+    def start_request_trace():
+        g.trace, g.trace_token = instrumentation.start_trace()
+
+    @app.after_request
+    def add_server_timing(response):
+        trace = g.get("trace")
+        if trace is not None and instrumentation.wants_breakdown(request.headers.get(instrumentation.BREAKDOWN_HEADER)):
+            response.headers["Server-Timing"] = trace.server_timing()
+        return response
+
+    @app.teardown_request
+    def finish_request_trace(exc):
+        trace = g.pop("trace", None)
+        if trace is not None:
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            instrumentation.finish_trace(trace, g.pop("trace_token"), endpoint)
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Stage and request latency histograms in the Prometheus text format."""
+    return Response(instrumentation.render(), content_type=instrumentation.CONTENT_TYPE)
+
+
+@app.before_request
+def refresh_dataset():
+    # Reload only when unique_flights.csv changed on disk; keep serving the old data if that fails
+    try:
+        mtime = os.path.getmtime(DATA_PATH)
+    except OSError:
+        return
+    if mtime != DATASET.mtime:
+        with RELOAD_LOCK:
+            if mtime != DATASET.mtime:
+                try:
+                    load_dataset()
+                except RuntimeError as e:
+                    app.logger.warning("Dataset reload failed: %s", e)
 
 # ========= API 0: Get available dropdown options =========
 @app.route("/available-options", methods=["GET"])
 def available_options():
-    airlines = df["AIRLINE"].dropna().unique().tolist()
-    origins = df["ORIGIN_AIRPORT"].dropna().unique().tolist()
-    destinations = df["DESTINATION_AIRPORT"].dropna().unique().tolist()
-
-    return jsonify({
-        "airlines": sorted(airlines),
-        "origins": sorted(origins),
-        "destinations": sorted(destinations)
-    })
+    # Pre-encoded at load time; clients revalidate with If-None-Match / If-Modified-Since
+    dataset = DATASET
+    response = Response(dataset.options_body, mimetype="application/json")
+    response.set_etag(dataset.options_etag)
+    response.last_modified = dataset.last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 # ========= API 1: Airline Delay Stats =========
 @app.route("/airline-delay-stats", methods=["GET"])
@@ -31,43 +123,9 @@ def airline_delay_stats():
     if not airline:
         return jsonify({"error": "Please provide an airline code"}), 400
 
-    airline_df = df[df["AIRLINE"] == airline]
-    if airline_df.empty:
+    response = DATASET.airline_stats.get(airline)
+    if response is None:
         return jsonify({"error": "Airline not found"}), 404
-
-    total_flights = len(airline_df)
-    avg_arrival_delay = airline_df["ARRIVAL_DELAY"].mean()
-    avg_departure_delay = airline_df["DEPARTURE_DELAY"].mean()
-
-    # Delay causes
-    delay_causes = {}
-    for col in ["AIR_SYSTEM_DELAY", "SECURITY_DELAY", "AIRLINE_DELAY", "LATE_AIRCRAFT_DELAY", "WEATHER_DELAY"]:
-        if col in airline_df.columns:
-            delay_causes[col.lower()] = airline_df[col].mean()
-
-    # Ranking logic
-    airline_group = df.groupby("AIRLINE").agg(
-        avg_arrival_delay=("ARRIVAL_DELAY", "mean"),
-        avg_departure_delay=("DEPARTURE_DELAY", "mean")
-    ).reset_index()
-
-    airline_group["rank_by_arrival"] = airline_group["avg_arrival_delay"].rank(method="min")
-    airline_group["rank_by_departure"] = airline_group["avg_departure_delay"].rank(method="min")
-
-    this_airline = airline_group[airline_group["AIRLINE"] == airline].iloc[0]
-
-    response = {
-        "airline": airline,
-        "total_flights": int(total_flights),
-        "avg_arrival_delay": round(avg_arrival_delay, 2),
-        "avg_departure_delay": round(avg_departure_delay, 2),
-        "delays_by_cause": {k: round(v, 2) for k, v in delay_causes.items()},
-        "ranking": {
-            "rank_by_arrival_delay": int(this_airline["rank_by_arrival"]),
-            "rank_by_departure_delay": int(this_airline["rank_by_departure"]),
-            "total_airlines": int(airline_group.shape[0])
-        }
-    }
     return jsonify(response)
 
 # ========= API 2: Route Performance =========
@@ -82,34 +140,16 @@ def route_performance():
             "error": "Please provide origin and destination, e.g., /route-performance?origin=JFK&destination=LAX"
         }), 400
 
-    route_data = df[
-        (df["ORIGIN_AIRPORT"] == origin) &
-        (df["DESTINATION_AIRPORT"] == destination)
-    ]
-    if airline:  # If airline filter is provided
-        route_data = route_data[route_data["AIRLINE"] == airline]
-
-    if route_data.empty:
-        return jsonify({"error": f"No data found for route {origin} -> {destination}"}), 404
-
-    # Count airlines on this route (without airline filter)
-    num_airlines = df[
-        (df["ORIGIN_AIRPORT"] == origin) &
-        (df["DESTINATION_AIRPORT"] == destination)
-    ]["AIRLINE"].nunique()
-
-    route_stats = {
-        "total_flights": int(len(route_data)),
-        "avg_arrival_delay": round(route_data["ARRIVAL_DELAY"].mean(), 2),
-        "avg_departure_delay": round(route_data["DEPARTURE_DELAY"].mean(), 2),
-        "num_airlines": int(num_airlines),  # NEW
-        "delay_distribution": {
-            "0-15min": int(((route_data["ARRIVAL_DELAY"] <= 15) & (route_data["ARRIVAL_DELAY"] > 0)).sum()),
-            "15-60min": int(((route_data["ARRIVAL_DELAY"] > 15) & (route_data["ARRIVAL_DELAY"] <= 60)).sum()),
-            "60+min": int((route_data["ARRIVAL_DELAY"] > 60).sum())
-        }
-    }
-    return jsonify(route_stats)
+    dataset = DATASET  # stats are computed and memoized against the same load
+    key = (origin, destination, airline)
+    stats = dataset.route_stats.get(key)
+    if stats is None:
+        with stage("route_stats"):
+            stats = route_stats(dataset.index, origin, destination, airline)
+        if stats is None:
+            return jsonify({"error": f"No data found for route {origin} -> {destination}"}), 404
+        dataset.route_stats[key] = stats
+    return jsonify(stats)
 
 # ========= Run App =========
 if __name__ == "__main__":
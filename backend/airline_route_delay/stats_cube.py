@@ -0,0 +1,76 @@
+CAUSE_COLUMNS = ["AIR_SYSTEM_DELAY", "SECURITY_DELAY", "AIRLINE_DELAY", "LATE_AIRCRAFT_DELAY", "WEATHER_DELAY"]
+ROUTE_KEYS = ["ORIGIN_AIRPORT", "DESTINATION_AIRPORT"]
+
+
+def build_airline_stats(df):
+    """Precompute the /airline-delay-stats payload of every airline, ranks included."""
+    causes = [col for col in CAUSE_COLUMNS if col in df.columns]
+    airline_group = df.groupby("AIRLINE").agg(
+        total_flights=("AIRLINE", "size"),
+        avg_arrival_delay=("ARRIVAL_DELAY", "mean"),
+        avg_departure_delay=("DEPARTURE_DELAY", "mean"),
+        **{col.lower(): (col, "mean") for col in causes}
+    )
+    airline_group["rank_by_arrival"] = airline_group["avg_arrival_delay"].rank(method="min")
+    airline_group["rank_by_departure"] = airline_group["avg_departure_delay"].rank(method="min")
+    total_airlines = int(airline_group.shape[0])
+
+    stats = {}
+    for airline, row in airline_group.iterrows():
+        stats[airline] = {
+            "airline": airline,
+            "total_flights": int(row["total_flights"]),
+            "avg_arrival_delay": round(row["avg_arrival_delay"], 2),
+            "avg_departure_delay": round(row["avg_departure_delay"], 2),
+            "delays_by_cause": {col.lower(): round(row[col.lower()], 2) for col in causes},
+            "ranking": {
+                "rank_by_arrival_delay": int(row["rank_by_arrival"]),
+                "rank_by_departure_delay": int(row["rank_by_departure"]),
+                "total_airlines": total_airlines
+            }
+        }
+    return stats
+
+
+class FlightIndex:
+    """Positional row index over the flights frame.
+
+    Rows are sorted by (origin, destination, airline), so every route and
+    route+airline is one contiguous slice.
+    """
+
+    def __init__(self, df):
+        keys = ROUTE_KEYS + ["AIRLINE"]
+        self.df = df.sort_values(keys, kind="stable").reset_index(drop=True)
+        self.routes = {key: slice(rows[0], rows[-1] + 1)
+                       for key, rows in self.df.groupby(ROUTE_KEYS, sort=False).indices.items()}
+        self.routes.update({key: slice(rows[0], rows[-1] + 1)
+                            for key, rows in self.df.groupby(keys, sort=False).indices.items()})
+
+    def route_rows(self, origin, destination, airline=None):
+        """Rows of a route (optionally one airline on it); None if there are none."""
+        key = (origin, destination, airline) if airline else (origin, destination)
+        rows = self.routes.get(key)
+        return None if rows is None else self.df.iloc[rows]
+
+
+def route_stats(index, origin, destination, airline=None):
+    """/route-performance payload computed from index slices; None if the route has no data."""
+    route_data = index.route_rows(origin, destination, airline)
+    if route_data is None:
+        return None
+
+    # Count airlines on this route (without airline filter)
+    num_airlines = index.route_rows(origin, destination)["AIRLINE"].nunique()
+    arrival = route_data["ARRIVAL_DELAY"]
+    return {
+        "total_flights": int(len(route_data)),
+        "avg_arrival_delay": round(arrival.mean(), 2),
+        "avg_departure_delay": round(route_data["DEPARTURE_DELAY"].mean(), 2),
+        "num_airlines": int(num_airlines),
+        "delay_distribution": {
+            "0-15min": int(((arrival <= 15) & (arrival > 0)).sum()),
+            "15-60min": int(((arrival > 15) & (arrival <= 60)).sum()),
+            "60+min": int((arrival > 60).sum())
+        }
+    }
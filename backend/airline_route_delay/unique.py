@@ -1,89 +1,321 @@
-import pandas as pd
+import argparse
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-# Load dataset
-df = pd.read_csv("flights2.csv")
+import numpy as np
+import pandas as pd
 
 # Create a unique flight ID combining airline + flight number
 # df['UNIQUE_FLIGHT_ID'] = df['AIRLINE'].astype(str) + "-" + df['FLIGHT_NUMBER'].astype(str)
 
-# Function to convert HHMM to minutes
+HHMM_COLS = ["SCHEDULED_DEPARTURE", "DEPARTURE_TIME", "SCHEDULED_ARRIVAL", "ARRIVAL_TIME"]
+
+# Most frequent value per flight (ties go to the smallest value, like Series.mode)
+MODE_COLS = ["AIRLINE", "FLIGHT_NUMBER", "TAIL_NUMBER", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT",
+             "CANCELLATION_REASON"]
+
+# Mean per flight; HHMM columns are averaged as minutes after midnight
+MEAN_COLS = [
+    "SCHEDULED_DEPARTURE_MINUTES", "DEPARTURE_TIME_MINUTES", "DEPARTURE_DELAY", "TAXI_OUT", "WHEELS_OFF",
+    "SCHEDULED_TIME", "ELAPSED_TIME", "AIR_TIME", "DISTANCE", "WHEELS_ON", "TAXI_IN",
+    "SCHEDULED_ARRIVAL_MINUTES", "ARRIVAL_TIME_MINUTES", "ARRIVAL_DELAY", "DIVERTED", "CANCELLED",
+    "AIR_SYSTEM_DELAY", "SECURITY_DELAY", "AIRLINE_DELAY", "LATE_AIRCRAFT_DELAY", "WEATHER_DELAY",
+]
+
+# Column order of unique_flights.csv
+OUTPUT_COLS = [
+    "UNIQUE_FLIGHT_ID", "DAY_OF_WEEK", "AIRLINE", "FLIGHT_NUMBER", "TAIL_NUMBER", "ORIGIN_AIRPORT",
+    "DESTINATION_AIRPORT", "DEPARTURE_DELAY", "TAXI_OUT", "WHEELS_OFF", "SCHEDULED_TIME", "ELAPSED_TIME",
+    "AIR_TIME", "DISTANCE", "WHEELS_ON", "TAXI_IN", "ARRIVAL_DELAY", "DIVERTED", "CANCELLED",
+    "CANCELLATION_REASON", "AIR_SYSTEM_DELAY", "SECURITY_DELAY", "AIRLINE_DELAY", "LATE_AIRCRAFT_DELAY",
+    "WEATHER_DELAY", "SCHEDULED_DEPARTURE", "DEPARTURE_TIME", "SCHEDULED_ARRIVAL", "ARRIVAL_TIME",
+]
+
+INPUT_COLS = (["UNIQUE_FLIGHT_ID", "DAY_OF_WEEK"] + MODE_COLS + HHMM_COLS
+              + [c for c in MEAN_COLS if not c.endswith("_MINUTES")])
+
+# Mode columns are read as text in every mode: a chunk whose airport codes or flight numbers are
+# all digits (e.g. the numeric airport codes of October 2015) would otherwise count them as ints
+TEXT_COLS = ["UNIQUE_FLIGHT_ID"] + MODE_COLS
+CSV_DTYPES = {col: str for col in TEXT_COLS}
+
+# Days-of-week bitmask (bit 0 = Monday) -> "1,2,..." label
+DOW_LABELS = np.array([",".join(str(d) for d in range(1, 8) if mask >> (d - 1) & 1) for mask in range(128)],
+                      dtype=object)
+
+
+# Convert HHMM values to minutes after midnight (NaN stays NaN)
 def hhmm_to_minutes(hhmm):
-    try:
-        hhmm = int(hhmm)
-        hours = hhmm // 100
-        minutes = hhmm % 100
-        return hours * 60 + minutes
-    except:
-        return pd.NA
-
-# Function to convert minutes back to HHMM format
+    hhmm = np.trunc(pd.to_numeric(hhmm, errors="coerce"))
+    return (hhmm // 100) * 60 + hhmm % 100
+
+
+# Convert minutes back to zero-padded HHMM strings (NaN becomes NA)
 def minutes_to_hhmm(minutes):
-    if pd.isna(minutes):
-        return pd.NA
-    minutes = int(round(minutes))
-    hours = (minutes // 60) % 24
-    mins = minutes % 60
-    return f"{hours:02d}{mins:02d}"
-
-# Convert HHMM columns to minutes
-hhmm_cols = ["SCHEDULED_DEPARTURE", "DEPARTURE_TIME", "SCHEDULED_ARRIVAL", "ARRIVAL_TIME"]
-for col in hhmm_cols:
-    df[col + "_MINUTES"] = df[col].apply(hhmm_to_minutes)
-
-# Define aggregation logic
-agg_dict = {
-    'DAY_OF_WEEK': lambda x: ','.join(sorted(map(str, sorted(x.unique())))),
-    'AIRLINE': lambda x: x.mode()[0] if not x.mode().empty else None,
-    'FLIGHT_NUMBER': lambda x: x.mode()[0] if not x.mode().empty else None,
-    'TAIL_NUMBER': lambda x: x.mode()[0] if not x.mode().empty else None,
-    'ORIGIN_AIRPORT': lambda x: x.mode()[0] if not x.mode().empty else None,
-    'DESTINATION_AIRPORT': lambda x: x.mode()[0] if not x.mode().empty else None,
-    'SCHEDULED_DEPARTURE_MINUTES': 'mean',
-    'DEPARTURE_TIME_MINUTES': 'mean',
-    'DEPARTURE_DELAY': 'mean',
-    'TAXI_OUT': 'mean',
-    'WHEELS_OFF': 'mean',
-    'SCHEDULED_TIME': 'mean',
-    'ELAPSED_TIME': 'mean',
-    'AIR_TIME': 'mean',
-    'DISTANCE': 'mean',
-    'WHEELS_ON': 'mean',
-    'TAXI_IN': 'mean',
-    'SCHEDULED_ARRIVAL_MINUTES': 'mean',
-    'ARRIVAL_TIME_MINUTES': 'mean',
-    'ARRIVAL_DELAY': 'mean',
-    'DIVERTED': 'mean',
-    'CANCELLED': 'mean',
-    'CANCELLATION_REASON': lambda x: x.mode()[0] if not x.mode().empty else None,
-    'AIR_SYSTEM_DELAY': 'mean',
-    'SECURITY_DELAY': 'mean',
-    'AIRLINE_DELAY': 'mean',
-    'LATE_AIRCRAFT_DELAY': 'mean',
-    'WEATHER_DELAY': 'mean'
-}
-
-# Group by unique flight ID
-agg_df = df.groupby("UNIQUE_FLIGHT_ID").agg(agg_dict).reset_index()
-
-# Convert minutes back to HHMM for scheduled/actual times
-agg_df['SCHEDULED_DEPARTURE'] = agg_df['SCHEDULED_DEPARTURE_MINUTES'].apply(minutes_to_hhmm)
-agg_df['DEPARTURE_TIME'] = agg_df['DEPARTURE_TIME_MINUTES'].apply(minutes_to_hhmm)
-agg_df['SCHEDULED_ARRIVAL'] = agg_df['SCHEDULED_ARRIVAL_MINUTES'].apply(minutes_to_hhmm)
-agg_df['ARRIVAL_TIME'] = agg_df['ARRIVAL_TIME_MINUTES'].apply(minutes_to_hhmm)
-
-# Drop intermediate minute columns
-agg_df.drop(columns=[
-    'SCHEDULED_DEPARTURE_MINUTES',
-    'DEPARTURE_TIME_MINUTES',
-    'SCHEDULED_ARRIVAL_MINUTES',
-    'ARRIVAL_TIME_MINUTES'
-], inplace=True)
-
-# Round numeric columns for readability
-numeric_cols = agg_df.select_dtypes(include=['float64']).columns
-agg_df[numeric_cols] = agg_df[numeric_cols].round(2)
-
-# Save to CSV
-agg_df.to_csv("unique_flights.csv", index=False)
-
-print("✅ unique_flights.csv created successfully!")
+    minutes = np.round(minutes.to_numpy(dtype=float))
+    hhmm = ((minutes // 60) % 24) * 100 + minutes % 60
+    out = np.full(len(hhmm), pd.NA, dtype=object)
+    valid = ~np.isnan(hhmm)
+    out[valid] = [f"{int(v):04d}" for v in hhmm[valid]]
+    return out
+
+
+def partial_aggregate(df):
+    """Mergeable per-flight partial aggregates of a chunk of raw rows.
+
+    Holds sums and non-null counts of every mean column, plus frequency
+    tables of (UNIQUE_FLIGHT_ID, value) for the mode columns and weekdays.
+    """
+    df = df[df["UNIQUE_FLIGHT_ID"].notna()]
+    flight_ids = df["UNIQUE_FLIGHT_ID"]
+
+    numeric = pd.DataFrame({col: pd.to_numeric(df[col], errors="coerce") for col in MEAN_COLS
+                            if not col.endswith("_MINUTES")}, index=df.index)
+    for col in HHMM_COLS:
+        numeric[col + "_MINUTES"] = hhmm_to_minutes(df[col])
+    grouped = numeric[MEAN_COLS].groupby(flight_ids)
+
+    day_of_week = pd.to_numeric(df["DAY_OF_WEEK"], errors="coerce")
+    freqs = {"DAY_OF_WEEK": day_of_week.groupby([flight_ids, day_of_week]).size()}
+    for col in MODE_COLS:
+        freqs[col] = df.groupby(["UNIQUE_FLIGHT_ID", col]).size()
+    return {"sums": grouped.sum(), "counts": grouped.count(), "freqs": freqs}
+
+
+def merge_partials(a, b):
+    """Combine two partial aggregates (e.g. from consecutive chunks)."""
+    return {
+        "sums": a["sums"].add(b["sums"], fill_value=0),
+        "counts": a["counts"].add(b["counts"], fill_value=0),
+        "freqs": {col: a["freqs"][col].add(b["freqs"][col], fill_value=0) for col in a["freqs"]},
+    }
+
+
+def day_of_week_labels(gid, days, n_groups):
+    """OR each flight's weekdays into a bitmask and render it as a sorted label."""
+    masks = np.zeros(n_groups, dtype=np.int64)
+    np.bitwise_or.at(masks, gid, 1 << (days.astype(np.int64) - 1))
+    return DOW_LABELS[masks]
+
+
+def group_modes(gid, values, counts, n_groups):
+    """Per-group mode from a frequency table, using factorized value codes."""
+    codes, uniques = pd.factorize(values, sort=True)
+    table = pd.DataFrame({"g": gid, "n": counts, "c": codes})
+    best = table.sort_values(["g", "n", "c"], ascending=[True, False, True]).drop_duplicates("g")
+
+    out = np.full(n_groups, None, dtype=object)
+    out[best["g"].to_numpy()] = np.asarray(uniques, dtype=object)[best["c"].to_numpy()]
+    return pd.Series(out).infer_objects()
+
+
+def summarize_partials(partial):
+    """Turn partial aggregates into one row per UNIQUE_FLIGHT_ID (minutes not yet converted)."""
+    sums = partial["sums"].sort_index()
+    counts = partial["counts"].reindex(sums.index)
+    flight_ids = sums.index
+    n_groups = len(flight_ids)
+
+    agg_df = pd.DataFrame({"UNIQUE_FLIGHT_ID": np.asarray(flight_ids, dtype=object)})
+    days = partial["freqs"]["DAY_OF_WEEK"]
+    agg_df["DAY_OF_WEEK"] = day_of_week_labels(
+        flight_ids.get_indexer(days.index.get_level_values(0)),
+        days.index.get_level_values(1).to_numpy(), n_groups)
+    for col in MODE_COLS:
+        freq = partial["freqs"][col]
+        agg_df[col] = group_modes(flight_ids.get_indexer(freq.index.get_level_values(0)),
+                                  freq.index.get_level_values(1), freq.to_numpy(), n_groups)
+    means = sums / counts.where(counts > 0)
+    for col in MEAN_COLS:
+        agg_df[col] = means[col].to_numpy()
+    return agg_df
+
+
+def aggregate(df):
+    """Partial aggregates and per-flight rows (minutes not yet converted) for raw rows."""
+    partial = partial_aggregate(df)
+    return partial, summarize_partials(partial)
+
+
+def concat_partials(partials):
+    """Combine partial aggregates that cover disjoint sets of flights."""
+    return {
+        "sums": pd.concat([p["sums"] for p in partials]),
+        "counts": pd.concat([p["counts"] for p in partials]),
+        "freqs": {col: pd.concat([p["freqs"][col] for p in partials]) for col in partials[0]["freqs"]},
+    }
+
+
+def restrict_partial(partial, flight_ids):
+    """Keep only the given flights of a partial aggregate."""
+    return {
+        "sums": partial["sums"].loc[flight_ids],
+        "counts": partial["counts"].loc[flight_ids],
+        "freqs": {col: freq[freq.index.get_level_values(0).isin(flight_ids)]
+                  for col, freq in partial["freqs"].items()},
+    }
+
+
+def finalize(agg_df):
+    """Convert minute means back to HHMM, round and order columns for the CSV."""
+    for col in HHMM_COLS:
+        agg_df[col] = minutes_to_hhmm(agg_df.pop(col + "_MINUTES"))
+
+    # Round numeric columns for readability
+    numeric_cols = agg_df.select_dtypes(include=["float64"]).columns
+    agg_df[numeric_cols] = agg_df[numeric_cols].round(2)
+    return agg_df[OUTPUT_COLS]
+
+
+def build_unique_flights(df, workers=1):
+    """Aggregate per flight, splitting sorted UNIQUE_FLIGHT_ID ranges across worker processes.
+
+    Returns the finalized rows and the partial aggregates they were built from.
+    """
+    df = df[df["UNIQUE_FLIGHT_ID"].notna()]
+    if workers <= 1 or len(df) == 0:
+        partial, agg_df = aggregate(df)
+        return finalize(agg_df), partial
+
+    # Contiguous ranges of the sorted IDs, so the partial results concatenate in order
+    gid, flight_ids = pd.factorize(df["UNIQUE_FLIGHT_ID"], sort=True)
+    partition = gid * workers // len(flight_ids)
+    parts = [df[partition == i] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(aggregate, parts))
+    agg_df = pd.concat([rows for _, rows in results], ignore_index=True)
+    return finalize(agg_df), concat_partials([partial for partial, _ in results])
+
+
+def iter_chunks(path, chunksize):
+    """Yield bounded-size DataFrames from a CSV file or Parquet row groups."""
+    if path.endswith(".parquet"):
+        import pyarrow as pa  # only needed for Parquet input
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=INPUT_COLS):
+            table = pa.Table.from_batches([batch])
+            for col in TEXT_COLS:
+                table = table.set_column(table.schema.get_field_index(col), col, table[col].cast(pa.string()))
+            yield table.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=INPUT_COLS, dtype=CSV_DTYPES, chunksize=chunksize, low_memory=False)
+
+
+def stream_partials(path, chunksize=1_000_000):
+    """Partial aggregates of a whole file, read chunk by chunk."""
+    partial = None
+    for chunk in iter_chunks(path, chunksize):
+        chunk_partial = partial_aggregate(chunk)
+        partial = chunk_partial if partial is None else merge_partials(partial, chunk_partial)
+    if partial is None:
+        raise ValueError(f"No rows found in {path}")
+    return partial
+
+
+def stream_unique_flights(path, chunksize=1_000_000):
+    """Build unique flights chunk by chunk, merging partial aggregates as it goes."""
+    partial = stream_partials(path, chunksize)
+    return finalize(summarize_partials(partial)), partial
+
+
+def input_record(path):
+    """Name and content hash of an input file, recorded in the state by every build and update."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {"name": os.path.basename(path), "sha256": digest.hexdigest()}
+
+
+def save_state(partial, path, inputs):
+    pd.to_pickle({**partial, "inputs": list(inputs)}, path)
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No aggregate state at {path}; run a full build first")
+    return pd.read_pickle(path)
+
+
+def save_outputs(agg_df, output_path, partial, state_path, inputs):
+    """Write the CSV and the state to temp files, then move both into place.
+
+    The CSV goes first: a crash between the two moves leaves the old state,
+    so re-running the same update merges it again and rewrites the same rows.
+    """
+    csv_tmp, state_tmp = f"{output_path}.tmp", f"{state_path}.tmp"
+    agg_df.to_csv(csv_tmp, index=False)
+    save_state(partial, state_tmp, inputs)
+    os.replace(csv_tmp, output_path)
+    os.replace(state_tmp, state_path)
+
+
+def update_unique_flights(new_path, output_path, state_path, chunksize=1_000_000):
+    """Merge a newly delivered file into the saved state and rewrite only the affected flights.
+
+    Untouched rows of the existing CSV are carried over as text, so their
+    formatting is unchanged. A file whose contents were already merged is
+    rejected with a ValueError.
+    """
+    state = load_state(state_path)
+    inputs = state.get("inputs", [])
+    record = input_record(new_path)
+    for merged in inputs:
+        if merged["sha256"] == record["sha256"]:
+            raise ValueError(f"{new_path} has already been merged into {state_path} (as {merged['name']})")
+
+    new_partial = stream_partials(new_path, chunksize)
+    partial = merge_partials(state, new_partial)
+    affected = new_partial["sums"].index
+
+    updated = finalize(summarize_partials(restrict_partial(partial, affected)))
+    # Round-trip through CSV text so updated rows are formatted exactly like a full build
+    updated = pd.read_csv(io.StringIO(updated.to_csv(index=False)), dtype=str, keep_default_na=False)
+    existing = pd.read_csv(output_path, dtype=str, keep_default_na=False)
+    kept = existing[~existing["UNIQUE_FLIGHT_ID"].isin(affected)]
+    agg_df = pd.concat([kept, updated], ignore_index=True).sort_values("UNIQUE_FLIGHT_ID", kind="stable")
+
+    save_outputs(agg_df, output_path, partial, state_path, inputs + [record])
+    return len(affected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate raw flights into unique_flights.csv")
+    parser.add_argument("--input", default="flights2.csv")
+    parser.add_argument("--output", default="unique_flights.csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes to split UNIQUE_FLIGHT_ID ranges across")
+    parser.add_argument("--chunksize", type=int, default=0,
+                        help="stream the input (CSV or .parquet) in chunks of this many rows")
+    parser.add_argument("--state", default="unique_flights_state.pkl",
+                        help="partial-aggregate state saved next to the output for --update")
+    parser.add_argument("--update", metavar="NEW_FILE",
+                        help="merge only this new file (e.g. one month) into the saved state and output")
+    args = parser.parse_args()
+
+    if args.update:
+        try:
+            n_updated = update_unique_flights(args.update, args.output, args.state, args.chunksize or 1_000_000)
+        except ValueError as e:
+            parser.exit(1, f"❌ {e}\n")
+        print(f"✅ {args.output} updated ({n_updated} flights)")
+        return
+
+    if args.chunksize:
+        # Out-of-core: peak memory is bounded by the number of flights, not rows
+        agg_df, partial = stream_unique_flights(args.input, args.chunksize)
+    else:
+        # Load dataset
+        df = pd.read_csv(args.input, usecols=INPUT_COLS, dtype=CSV_DTYPES, low_memory=False)
+        agg_df, partial = build_unique_flights(df, args.workers)
+
+    # Save to CSV
+    save_outputs(agg_df, args.output, partial, args.state, [input_record(args.input)])
+    print(f"✅ {args.output} created successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import asyncio
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesce concurrent predictions into a single engine call.
+
+    Callers submit feature matrices (one or more rows). Pending matrices are
+    flushed as one stacked batch once ``max_batch_size`` rows are queued or
+    ``max_wait_ms`` has passed since the first one arrived, whichever comes
+    first. Scoring runs in the default executor so the event loop stays free.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = []
+        self._pending_rows = 0
+        self._timer = None
+
+    async def predict(self, features):
+        """Queue a feature matrix and wait for its probabilities."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future))
+        self._pending_rows += len(features)
+
+        if self._pending_rows >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        if batch:
+            asyncio.get_running_loop().create_task(self._score(batch))
+
+    async def _score(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            probs = await loop.run_in_executor(None, self.predict_fn, np.vstack([f for f, _ in batch]))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Fan each caller's slice of the stacked result back out
+        splits = np.cumsum([len(f) for f, _ in batch])[:-1]
+        for (_, future), result in zip(batch, np.split(probs, splits)):
+            if not future.done():
+                future.set_result(result)
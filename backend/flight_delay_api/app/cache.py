@@ -0,0 +1,161 @@
+# Vendored from shared/prediction_cache.py by shared/sync.py; edit the source and re-run the script.
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def file_version(*paths):
+    """Fingerprint of the given files (mtime and size); changes when any is replaced."""
+    parts = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except (OSError, TypeError):
+            parts.append("-")
+    return "|".join(parts)
+
+
+class PredictionCache:
+    """Bounded LRU + TTL cache of delay probabilities keyed on encoded feature rows.
+
+    ``version`` is the ``file_version`` of the model/data files as this
+    process loaded them, taken before loading; it never changes while the
+    process runs, so values computed by an old model are never stored under a
+    newer model's tag. ``shared_path`` adds a SQLite file behind the
+    in-process LRU so several uvicorn workers on one host share hits, each
+    reading only entries of its own version. The shared file is best effort:
+    a locked or failing database counts as a miss or a skipped write.
+    """
+
+    def __init__(self, max_size=10000, ttl=3600, version="", shared_path=None, watch_paths=(),
+                 busy_timeout=0.1, prune_interval=60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_path = shared_path
+        self.watch_paths = tuple(watch_paths)  # only used to tell whether ``version`` is still current
+        self.busy_timeout = busy_timeout
+        self.prune_interval = prune_interval
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.shared_errors = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._version = version
+        self._pruned_at = 0.0  # prune on the first write
+        if shared_path:
+            self._connect().execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, version TEXT NOT NULL, value REAL NOT NULL, expires REAL NOT NULL)"
+            )
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.shared_path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return the cached probability for ``key`` or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        if self.shared_path:
+            try:
+                row = self._connect().execute(
+                    "SELECT value, expires FROM predictions WHERE key = ? AND version = ? AND expires > ?",
+                    (repr(key), self._version, now),
+                ).fetchone()
+            except sqlite3.OperationalError:
+                row = None
+                with self._lock:
+                    self.shared_errors += 1
+            if row is not None:
+                self._remember(key, row[0], row[1])
+                with self._lock:
+                    self.hits += 1
+                    self.shared_hits += 1
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        """Store a probability for ``key``."""
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        """Store ``(key, probability)`` pairs; shared rows are written in one transaction."""
+        expires = time.time() + self.ttl
+        rows = []
+        for key, value in items:
+            self._remember(key, value, expires)
+            rows.append((repr(key), self._version, value, expires))
+        if self.shared_path and rows:
+            self._write_shared(rows)
+
+    def _write_shared(self, rows):
+        now = time.monotonic()
+        prune = now - self._pruned_at >= self.prune_interval
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO predictions (key, version, value, expires) VALUES (?, ?, ?, ?)", rows
+                )
+                if prune:
+                    conn.execute("DELETE FROM predictions WHERE expires <= ?", (time.time(),))
+                    if self._is_current():
+                        # Only a process running the files now on disk may drop other versions as outdated
+                        conn.execute("DELETE FROM predictions WHERE version != ?", (self._version,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.OperationalError:
+            with self._lock:
+                self.shared_errors += 1
+            return
+        if prune:
+            self._pruned_at = now
+
+    def _is_current(self):
+        return bool(self.watch_paths) and file_version(*self.watch_paths) == self._version
+
+    def _remember(self, key, value, expires):
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "model_version": self._version,
+        }
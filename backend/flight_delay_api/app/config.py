@@ -6,3 +6,16 @@ load_dotenv()
 DATA_PATH = os.getenv("DATA_PATH")
 MODEL_PATH = os.getenv("MODEL_PATH")
 ENCODER_PATH = os.getenv("ENCODER_PATH")
+ROUTE_INDEX_PATH = os.getenv("ROUTE_INDEX_PATH", "./models/route_distance.pkl")
+SLIM_DATA_PATH = os.getenv("SLIM_DATA_PATH", "./data/flights.feather")
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "booster")  # "booster" or "numpy"
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0")) or None  # pin XGBoost threads per worker
+# Micro-batching of concurrent /predict calls
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "1") == "1"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))  # rows per booster call
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))  # max added latency
+ROUTE_SLOTS_PATH = os.getenv("ROUTE_SLOTS_PATH", "./models/route_slots.feather")
+# Prediction cache (size 0 disables; PREDICTION_CACHE_PATH shares hits across workers via SQLite)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))  # seconds
+PREDICTION_CACHE_PATH = os.getenv("PREDICTION_CACHE_PATH") or None
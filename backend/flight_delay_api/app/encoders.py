@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import joblib
+
+# Code used for categories the encoder never saw during training
+UNKNOWN_CODE = 0
+
+
+class CodeTable:
+    """Hash-based label codes compiled from a fitted LabelEncoder."""
+
+    def __init__(self, classes, unknown=UNKNOWN_CODE):
+        labels = [str(c) for c in classes]
+        self.codes = {label: code for code, label in enumerate(labels)}
+        self.index = pd.Index(labels)
+        self.unknown = unknown
+
+    def encode(self, value):
+        """Encode a single value with a dict lookup."""
+        return self.codes.get(str(value), self.unknown)
+
+    def encode_many(self, values):
+        """Encode a whole array of values in one vectorized pass."""
+        codes = self.index.get_indexer(pd.Index(np.asarray(values)).astype(str))
+        codes[codes < 0] = self.unknown
+        return codes
+
+
+def load_code_tables(path):
+    """Load pickled LabelEncoders and compile them into CodeTables."""
+    return {col: CodeTable(le.classes_) for col, le in joblib.load(path).items()}
@@ -0,0 +1,112 @@
+import json
+import sys
+import numpy as np
+import xgboost as xgb
+
+
+class BoosterEngine:
+    """Native XGBoost Booster scored with inplace_predict on float32 arrays."""
+
+    def __init__(self, model_path, n_threads=None):
+        self.booster = xgb.Booster()
+        self.booster.load_model(model_path)
+        if n_threads:
+            self.booster.set_param({"nthread": n_threads})
+
+    def predict(self, X):
+        """Return positive-class probabilities for a 2-D float32 feature matrix."""
+        return self.booster.inplace_predict(np.ascontiguousarray(X, dtype=np.float32))
+
+
+class TreeEngine:
+    """Pure-NumPy tree walker compiled from the XGBoost JSON model dump.
+
+    All trees are packed into flat node arrays, so a batch walks every tree
+    at once, one level per step, with no per-call XGBoost overhead.
+    """
+
+    def __init__(self, model_path):
+        with open(model_path) as f:
+            learner = json.load(f)["learner"]
+        if learner["objective"]["name"] != "binary:logistic":
+            raise ValueError(f"Unsupported objective: {learner['objective']['name']}")
+        trees = learner["gradient_booster"]["model"]["trees"]
+
+        left, right, feature, threshold, default_left, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            roots.append(offset)
+            lc = np.asarray(tree["left_children"])
+            rc = np.asarray(tree["right_children"])
+            is_leaf = lc == -1
+            # Leaves point back at themselves so extra walk steps are no-ops
+            own = np.arange(len(lc)) + offset
+            left.append(np.where(is_leaf, own, lc + offset))
+            right.append(np.where(is_leaf, own, rc + offset))
+            feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+            threshold.append(tree["split_conditions"])  # leaf value on leaf nodes
+            default_left.append(tree["default_left"])
+            offset += len(lc)
+
+        self.left = np.concatenate(left).astype(np.int32)
+        self.right = np.concatenate(right).astype(np.int32)
+        self.feature = np.concatenate(feature).astype(np.int32)
+        self.threshold = np.concatenate(threshold).astype(np.float32)
+        self.default_left = np.concatenate(default_left).astype(bool)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.depth = max(self._tree_depth(t["left_children"], t["right_children"]) for t in trees)
+
+        base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+        self.base_margin = float(np.log(base_score / (1 - base_score)))
+
+    @staticmethod
+    def _tree_depth(left_children, right_children):
+        depth, level = 0, [0]
+        while level:
+            level = [c for n in level for c in (left_children[n], right_children[n]) if c != -1]
+            depth += bool(level)
+        return depth
+
+    def predict(self, X):
+        """Return positive-class probabilities for a 2-D float32 feature matrix."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            values = X[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(values), self.default_left[nodes], values < self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        margin = self.threshold[nodes].sum(axis=1, dtype=np.float64) + self.base_margin
+        return (1.0 / (1.0 + np.exp(-margin))).astype(np.float32)
+
+
+ENGINES = {"booster": BoosterEngine, "numpy": TreeEngine}
+
+
+def load_engine(model_path, name="booster", n_threads=None):
+    """Build the configured inference engine for an XGBoost JSON model."""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown inference engine {name!r}; expected one of {sorted(ENGINES)}")
+    if name == "booster":
+        return BoosterEngine(model_path, n_threads)
+    return TreeEngine(model_path)
+
+
+def check_parity(model_path, n_rows=10000, seed=0, atol=1e-5):
+    """Score random feature rows with both engines and return the max abs difference."""
+    booster = BoosterEngine(model_path)
+    trees = TreeEngine(model_path)
+    n_features = booster.booster.num_features()
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 2500, size=(n_rows, n_features)).astype(np.float32)
+    X[rng.random(X.shape) < 0.01] = np.nan
+    diff = float(np.abs(booster.predict(X) - trees.predict(X)).max())
+    if diff > atol:
+        raise AssertionError(f"Engines disagree: max abs diff {diff:.2e} > {atol:.0e}")
+    return diff
+
+
+if __name__ == "__main__":
+    # python -m app.engine [model_path]
+    path = sys.argv[1] if len(sys.argv) > 1 else "./models/xgb_delay_model.json"
+    print(f"Engine parity OK, max abs diff {check_parity(path):.2e}")
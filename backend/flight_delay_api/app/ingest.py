@@ -0,0 +1,108 @@
+import os
+import sys
+import joblib
+import numpy as np
+import pandas as pd
+from pyarrow import feather
+from .config import DATA_PATH, SLIM_DATA_PATH, ROUTE_INDEX_PATH, ROUTE_SLOTS_PATH
+
+# Only the columns the predictor reads, with compact dtypes
+COLUMNS = {
+    "AIRLINE": "category",
+    "ORIGIN_AIRPORT": "category",
+    "DESTINATION_AIRPORT": "category",
+    "SCHEDULED_DEPARTURE": "int16",
+    "DISTANCE": "int16",
+}
+SLOT_COLUMNS = ["ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "AIRLINE", "SCHEDULED_DEPARTURE"]
+
+
+def is_fresh(artifact_path, source_path):
+    """True if the artifact exists and is not older than its source file."""
+    if not os.path.exists(artifact_path):
+        return False
+    if not source_path or not os.path.exists(source_path):
+        return True
+    return os.path.getmtime(artifact_path) >= os.path.getmtime(source_path)
+
+
+def write_feather(frame, out_path):
+    # Write next to the target and swap in, so concurrent workers never see a partial file
+    tmp_path = f"{out_path}.tmp{os.getpid()}"
+    feather.write_feather(frame, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, out_path)
+
+
+def convert(csv_path=DATA_PATH, out_path=SLIM_DATA_PATH):
+    """Convert the raw flights CSV into an uncompressed, typed Feather file."""
+    frame = pd.read_csv(csv_path, usecols=list(COLUMNS), dtype=COLUMNS)
+    write_feather(frame[list(COLUMNS)], out_path)
+    return out_path
+
+
+def load_slim(path=SLIM_DATA_PATH):
+    """Memory-map the slim Feather file into a DataFrame."""
+    table = feather.read_table(path, columns=list(COLUMNS), memory_map=True)
+    return table.to_pandas()
+
+
+def load_flights(csv_path=DATA_PATH, slim_path=SLIM_DATA_PATH):
+    """Load the slim flights table, converting the CSV first if needed."""
+    if not is_fresh(slim_path, csv_path):
+        convert(csv_path, slim_path)
+    return load_slim(slim_path)
+
+
+def build_route_index(frame):
+    """Map (origin, destination) to mean route distance, plus the global fallback."""
+    means = frame.groupby(["ORIGIN_AIRPORT", "DESTINATION_AIRPORT"], observed=True)["DISTANCE"].mean().dropna()
+    return {
+        "routes": {route: int(distance) for route, distance in means.items()},
+        "global": int(frame["DISTANCE"].mean()),
+    }
+
+
+def build_route_slots(frame):
+    """Distinct (airline, scheduled departure) slots of every route, sorted by route."""
+    slots = frame[SLOT_COLUMNS].drop_duplicates()
+    return slots.sort_values(SLOT_COLUMNS).reset_index(drop=True)
+
+
+def load_route_slots(path=ROUTE_SLOTS_PATH):
+    """Load the slots table as {(origin, destination): (airlines, departures)}."""
+    slots = feather.read_table(path, memory_map=True).to_pandas()
+    origins = slots["ORIGIN_AIRPORT"].cat.codes.to_numpy()
+    destinations = slots["DESTINATION_AIRPORT"].cat.codes.to_numpy()
+    airlines = slots["AIRLINE"].to_numpy(dtype=object)
+    departures = slots["SCHEDULED_DEPARTURE"].to_numpy()
+
+    # Rows are sorted by route, so each route is one contiguous block
+    starts = np.flatnonzero(np.r_[True, (origins[1:] != origins[:-1]) | (destinations[1:] != destinations[:-1])])
+    ends = np.r_[starts[1:], len(slots)]
+    return {
+        (slots["ORIGIN_AIRPORT"].iat[s], slots["DESTINATION_AIRPORT"].iat[s]): (airlines[s:e], departures[s:e])
+        for s, e in zip(starts, ends)
+    }
+
+
+def build_artifacts(csv_path=DATA_PATH, slim_path=SLIM_DATA_PATH,
+                    index_path=ROUTE_INDEX_PATH, slots_path=ROUTE_SLOTS_PATH):
+    """Build the slim data file, route distance index and route slots table."""
+    frame = load_flights(csv_path, slim_path)
+    joblib.dump(build_route_index(frame), index_path)
+    write_feather(build_route_slots(frame), slots_path)
+
+
+def load_artifacts():
+    """Load the route index and route slots, rebuilding anything stale first."""
+    if not (is_fresh(SLIM_DATA_PATH, DATA_PATH)
+            and is_fresh(ROUTE_INDEX_PATH, SLIM_DATA_PATH)
+            and is_fresh(ROUTE_SLOTS_PATH, SLIM_DATA_PATH)):
+        build_artifacts()
+    return joblib.load(ROUTE_INDEX_PATH), load_route_slots(ROUTE_SLOTS_PATH)
+
+
+if __name__ == "__main__":
+    # python -m app.ingest [csv_path]
+    build_artifacts(*sys.argv[1:2])
+    print(f"Wrote {SLIM_DATA_PATH}, {ROUTE_INDEX_PATH} and {ROUTE_SLOTS_PATH}")
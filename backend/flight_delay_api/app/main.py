@@ -1,7 +1,21 @@
-from fastapi import FastAPI
+import json
+from typing import List
+import pandas as pd
+from pyarrow import ipc
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from app.model_utils import preprocess_input, suggest_alternatives
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, ValidationError
+from app.batcher import MicroBatcher
+from app import instrumentation
+from app.config import MICROBATCH_ENABLED, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS
+from app.instrumentation import stage, timed
+from app.model_utils import (
+    alternative_candidates, build_features, cache_probabilities, cached_probabilities,
+    predict_batch, predict_flights, prediction_cache, rank_alternatives, suggest_alternatives
+)
 
 app = FastAPI(title="Flight Delay Predictor API")
 
@@ -14,6 +28,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-endpoint latency histograms; send X-Timing-Breakdown: 1 to get this request's stages as Server-Timing
+if instrumentation.ENABLED:
+    app.add_middleware(instrumentation.TraceMiddleware)
+
 class FlightRequest(BaseModel):
     date: str
     airline: str
@@ -21,20 +39,58 @@ class FlightRequest(BaseModel):
     destination: str
     sched_departure: int
 
+class FlightBatchRequest(BaseModel):
+    flights: List[FlightRequest]
+    include_alternatives: bool = False
+
+FLIGHT_FIELDS = ["date", "airline", "origin", "destination", "sched_departure"]
+NDJSON_TYPES = {"application/x-ndjson", "application/jsonl"}
+ARROW_TYPES = {"application/vnd.apache.arrow.stream"}
+
 @app.get("/")
 def root():
     return {"message": "Flight Delay API is running!"}
 
+@app.get("/cache/stats")
+def cache_stats():
+    return prediction_cache.stats()
+
+@app.get("/metrics")
+def metrics():
+    """Stage and request latency histograms in the Prometheus text format."""
+    return PlainTextResponse(instrumentation.render(), media_type=instrumentation.CONTENT_TYPE)
+
+# Concurrent /predict requests share booster calls through the micro-batcher
+batcher = MicroBatcher(predict_batch, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS)
+
+@timed("score")  # includes time queued in the micro-batcher
+async def score(features):
+    if MICROBATCH_ENABLED:
+        return await batcher.predict(features)
+    return await run_in_threadpool(predict_batch, features)
+
+async def cache_io(fn, *args):
+    # The in-process LRU is answered inline; the shared SQLite file can wait on a lock
+    if prediction_cache.shared_path:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+async def score_cached(features):
+    probs, missing = await cache_io(cached_probabilities, features)
+    if missing.any():
+        probs[missing] = await score(features[missing])
+        await cache_io(cache_probabilities, features[missing], probs[missing])
+    return probs
+
 @app.post("/predict")
-def predict_delay(flight: FlightRequest):
-    prob_delay = preprocess_input(
-        flight_date=flight.date,
-        airline=flight.airline,
-        origin=flight.origin,
-        destination=flight.destination,
-        sched_departure=flight.sched_departure
-    )
-    alternatives = suggest_alternatives(flight.dict())
+async def predict_delay(flight: FlightRequest):
+    features = build_features(flight.date, [flight.airline], flight.origin,
+                              flight.destination, [flight.sched_departure])
+    prob_delay = float((await score_cached(features))[0])
+
+    with stage("alternatives"):
+        slots, alt_features = alternative_candidates(flight.dict())
+        alternatives = rank_alternatives(slots, await score(alt_features)) if len(alt_features) else []
     response_prob = round(prob_delay, 2) if isinstance(prob_delay, float) else prob_delay
     return {
         "flight": flight.dict(),
@@ -42,3 +98,71 @@ def predict_delay(flight: FlightRequest):
         "delay_probability": response_prob,            # <-- CRUCIAL for your JS!
         "alternative_flights": alternatives
     }
+
+def json_object(value, expected):
+    """``value`` if it decoded to a JSON object, else a ValueError (answered with a 400)."""
+    if not isinstance(value, dict):
+        raise ValueError(f"expected {expected}, got {type(value).__name__}")
+    return value
+
+@timed("parse")
+def parse_flight_batch(body, content_type, include_alternatives):
+    """Parse a JSON, NDJSON or Arrow IPC stream batch into a flights DataFrame."""
+    if content_type in ARROW_TYPES:
+        flights = ipc.open_stream(body).read_all().to_pandas()
+        missing = [f for f in FLIGHT_FIELDS if f not in flights.columns]
+        if missing:
+            raise ValueError(f"Arrow batch is missing columns: {missing}")
+        flights = flights[FLIGHT_FIELDS].astype({"date": str, "airline": str, "origin": str,
+                                                 "destination": str, "sched_departure": int})
+        return flights, include_alternatives
+
+    if content_type in NDJSON_TYPES:
+        records = [FlightRequest(**json_object(json.loads(line), "one JSON object per line")).dict()
+                   for line in body.splitlines() if line.strip()]
+    else:
+        payload = json.loads(body)
+        if isinstance(payload, list):
+            payload = {"flights": payload}
+        batch = FlightBatchRequest(**json_object(payload, "a JSON object or a list of flights"))
+        records = [flight.dict() for flight in batch.flights]
+        include_alternatives = include_alternatives or batch.include_alternatives
+    return pd.DataFrame(records, columns=FLIGHT_FIELDS), include_alternatives
+
+def score_flight_batch(flights, include_alternatives):
+    probs = predict_flights(flights)
+    results = []
+    for flight, prob_delay in zip(flights.to_dict(orient="records"), probs):
+        response_prob = round(float(prob_delay), 2)
+        result = {
+            "flight": flight,
+            "prob_delay": response_prob,
+            "delay_probability": response_prob
+        }
+        if include_alternatives:
+            result["alternative_flights"] = suggest_alternatives(flight)
+        results.append(result)
+    return {"count": len(results), "predictions": results}
+
+@app.post("/predict_batch")
+async def predict_delay_batch(request: Request, include_alternatives: bool = False):
+    """Score many flights at once.
+
+    Accepts ``{"flights": [...], "include_alternatives": false}`` or a bare
+    list of flights as JSON, one flight per line as NDJSON, or an Arrow IPC
+    stream with the FlightRequest columns. Alternatives are skipped unless
+    requested.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    try:
+        flights, include_alternatives = parse_flight_batch(body, content_type, include_alternatives)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse flight batch: {e}")
+
+    try:
+        return await run_in_threadpool(score_flight_batch, flights, include_alternatives)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
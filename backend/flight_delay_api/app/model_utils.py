@@ -1,77 +1,173 @@
+import numpy as np
 import pandas as pd
 import datetime
-import joblib
-from xgboost import XGBClassifier
-from .config import DATA_PATH, MODEL_PATH, ENCODER_PATH
+from .cache import PredictionCache, file_version
+from .config import (
+    MODEL_PATH, ENCODER_PATH, INFERENCE_ENGINE, INFERENCE_THREADS,
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, PREDICTION_CACHE_PATH
+)
+from .encoders import load_code_tables
+from .engine import load_engine
+from .instrumentation import timed
+from .ingest import load_artifacts
 
-# Load sampled CSV ONCE at startup (all columns, sampled rows)
-df = pd.read_csv(DATA_PATH, low_memory=False)
+# Route distances and per-route (airline, departure) slots, built offline by
+# app/ingest.py and rebuilt here only when the flights data is newer
+route_index, route_slots = load_artifacts()
 
-# Load XGBoost model
-xgb_model = XGBClassifier()
-xgb_model.load_model(MODEL_PATH)
+# Fingerprint the model files before loading them, so cached values are never
+# tagged with a newer version than the model that computed them
+model_version = file_version(MODEL_PATH, ENCODER_PATH)
 
-# Load LabelEncoders
-le_dict = joblib.load(ENCODER_PATH)
+# Load XGBoost model into the configured inference engine (see app/engine.py)
+engine = load_engine(MODEL_PATH, INFERENCE_ENGINE, INFERENCE_THREADS)
+
+# Load LabelEncoders, compiled into dict-based code tables
+code_tables = load_code_tables(ENCODER_PATH)
+
+# Cached probabilities keyed on encoded feature rows and the loaded model's version
+prediction_cache = PredictionCache(
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, model_version, PREDICTION_CACHE_PATH,
+    watch_paths=(MODEL_PATH, ENCODER_PATH)
+)
+
+NO_SLOTS = (np.empty(0, dtype=object), np.empty(0, dtype=np.int16))
+
+
+FEATURES = [
+    "MONTH", "DAY", "DAY_OF_WEEK", "AIRLINE", "FLIGHT_NUMBER",
+    "ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "SCHEDULED_DEPARTURE", "DISTANCE",
+]
+CATEGORICAL = ["AIRLINE", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT"]
+
+
+def route_distance(origin, destination):
+    """Mean distance of a route, falling back to the global mean."""
+    return route_index["routes"].get((origin, destination), route_index["global"])
+
+
+@timed("encode")
+def build_features(flight_date, airlines, origin, destination, sched_departures):
+    """Build the encoded float32 feature matrix for many flights on one route and date."""
+    date_obj = datetime.datetime.strptime(flight_date, "%Y-%m-%d")
+    n = len(airlines)
+
+    columns = {
+        "MONTH": np.full(n, date_obj.month),
+        "DAY": np.full(n, date_obj.day),
+        "DAY_OF_WEEK": np.full(n, date_obj.isoweekday()),
+        "AIRLINE": code_tables["AIRLINE"].encode_many(airlines),
+        "FLIGHT_NUMBER": np.zeros(n, dtype=int),  # dummy
+        "ORIGIN_AIRPORT": np.full(n, code_tables["ORIGIN_AIRPORT"].encode(origin)),
+        "DESTINATION_AIRPORT": np.full(n, code_tables["DESTINATION_AIRPORT"].encode(destination)),
+        "SCHEDULED_DEPARTURE": np.asarray(sched_departures, dtype=int),
+        "DISTANCE": np.full(n, route_distance(origin, destination)),
+    }
+    return np.column_stack([columns[f] for f in FEATURES]).astype(np.float32)
+
+
+@timed("encode")
+def build_flight_features(flights):
+    """Build the encoded float32 feature matrix for flights on any mix of routes and dates.
+
+    ``flights`` is a DataFrame with date, airline, origin, destination and
+    sched_departure columns, one row per flight.
+    """
+    dates = pd.to_datetime(flights["date"], format="%Y-%m-%d")
+    origins = flights["origin"].tolist()
+    destinations = flights["destination"].tolist()
+
+    columns = {
+        "MONTH": dates.dt.month.to_numpy(),
+        "DAY": dates.dt.day.to_numpy(),
+        "DAY_OF_WEEK": dates.dt.dayofweek.to_numpy() + 1,  # ISO weekday
+        "AIRLINE": code_tables["AIRLINE"].encode_many(flights["airline"]),
+        "FLIGHT_NUMBER": np.zeros(len(flights), dtype=int),  # dummy
+        "ORIGIN_AIRPORT": code_tables["ORIGIN_AIRPORT"].encode_many(origins),
+        "DESTINATION_AIRPORT": code_tables["DESTINATION_AIRPORT"].encode_many(destinations),
+        "SCHEDULED_DEPARTURE": flights["sched_departure"].to_numpy(dtype=int),
+        "DISTANCE": [route_distance(o, d) for o, d in zip(origins, destinations)],
+    }
+    return np.column_stack([columns[f] for f in FEATURES]).astype(np.float32)
+
+
+def predict_flights(flights):
+    """Return delay probabilities for a DataFrame of flights in one vectorized pass."""
+    if flights.empty:
+        return np.empty(0)
+    return predict_cached(build_flight_features(flights))
+
+
+@timed("predict_proba")
+def predict_batch(features):
+    """Score an encoded float32 feature matrix with a single engine call."""
+    return engine.predict(features)
+
+
+@timed("cache")
+def cached_probabilities(features):
+    """Look up each feature row in the cache; returns (probs, mask of rows still to score)."""
+    probs = np.full(len(features), np.nan, dtype=np.float32)
+    if prediction_cache.enabled:
+        for i, row in enumerate(features):
+            hit = prediction_cache.get(row.tobytes())
+            if hit is not None:
+                probs[i] = hit
+    return probs, np.isnan(probs)
+
+
+@timed("cache")
+def cache_probabilities(features, probs):
+    if prediction_cache.enabled:
+        prediction_cache.set_many((row.tobytes(), float(prob)) for row, prob in zip(features, probs))
+
+
+def predict_cached(features):
+    """Score a feature matrix, serving repeated rows from the prediction cache."""
+    probs, missing = cached_probabilities(features)
+    if missing.any():
+        probs[missing] = predict_batch(features[missing])
+        cache_probabilities(features[missing], probs[missing])
+    return probs
 
-# ... rest of your code unchanged ...
 
 def preprocess_input(flight_date, airline, origin, destination, sched_departure):
     """Return probability of delay for a single flight."""
-    date_obj = datetime.datetime.strptime(flight_date, "%Y-%m-%d")
-    month = date_obj.month
-    day = date_obj.day
-    day_of_week = date_obj.isoweekday()
-
-    # Use global df, not lazy reloading
-    distance = df[(df["ORIGIN_AIRPORT"] == origin) & (df["DESTINATION_AIRPORT"] == destination)]["DISTANCE"].mean()
-    distance = int(distance) if not pd.isna(distance) else int(df["DISTANCE"].mean())
-
-    input_df = pd.DataFrame({
-        "MONTH": [month],
-        "DAY": [day],
-        "DAY_OF_WEEK": [day_of_week],
-        "AIRLINE": [airline],
-        "FLIGHT_NUMBER": [0],  # dummy
-        "ORIGIN_AIRPORT": [origin],
-        "DESTINATION_AIRPORT": [destination],
-        "SCHEDULED_DEPARTURE": [sched_departure],
-        "DISTANCE": [distance]
-    })
-
-    # Encode categorical
-    for col in ["AIRLINE", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT"]:
-        input_df[col] = input_df[col].astype(str)
-        le = le_dict[col]
-        input_df[col] = le.transform(input_df[col]) if input_df[col].iloc[0] in le.classes_ else 0
-
-    prob_delay = xgb_model.predict_proba(input_df)[:, 1][0]
-    return float(prob_delay)
+    features = build_features(flight_date, [airline], origin, destination, [sched_departure])
+    return float(predict_cached(features)[0])
 
-def suggest_alternatives(user_input, top_n=5):
+@timed("alternatives.lookup")
+def alternative_candidates(user_input):
+    """Look up every (airline, departure) slot of a route and build its feature matrix."""
     origin = user_input["origin"]
     dest = user_input["destination"]
-    date_str = user_input["date"]
-
-    # Use global df, not lazy reloading
-    candidates = df[(df["ORIGIN_AIRPORT"] == origin) & (df["DESTINATION_AIRPORT"] == dest)]
-    if len(candidates) > 20:
-        candidates = candidates.sample(20, random_state=42)
-
-    results = []
-    for _, row in candidates.iterrows():
-        prob_delay = preprocess_input(
-            flight_date=date_str,
-            airline=row["AIRLINE"],
-            origin=row["ORIGIN_AIRPORT"],
-            destination=row["DESTINATION_AIRPORT"],
-            sched_departure=row["SCHEDULED_DEPARTURE"]
-        )
-        results.append({
-            "airline": row["AIRLINE"],
-            "departure": row["SCHEDULED_DEPARTURE"],
-            "prob_delay": float(round(prob_delay, 2))
-        })
+
+    airlines, departures = route_slots.get((origin, dest), NO_SLOTS)
+    features = build_features(user_input["date"], airlines, origin, dest, departures)
+    return (airlines, departures), features
+
+
+@timed("alternatives.rank")
+def rank_alternatives(slots, probs, top_n=5):
+    """Turn scored route slots into the top_n lowest-risk alternatives."""
+    airlines, departures = slots
+    results = [
+        {
+            "airline": airline,
+            "departure": departure,
+            "prob_delay": round(float(prob_delay), 2)
+        }
+        for airline, departure, prob_delay in zip(airlines, departures.tolist(), probs)
+    ]
 
     results = sorted(results, key=lambda x: x["prob_delay"])[:top_n]
     return results
+
+
+@timed("alternatives")
+def suggest_alternatives(user_input, top_n=5):
+    slots, features = alternative_candidates(user_input)
+    if not len(features):
+        return []
+    # Score every slot on the route in one vectorized pass
+    return rank_alternatives(slots, predict_batch(features), top_n)
@@ -0,0 +1,41 @@
+import os
+import sqlite3
+
+from app.cache import PredictionCache, file_version
+
+
+def shared_versions(db_path):
+    return {v for (v,) in sqlite3.connect(db_path).execute("SELECT version FROM predictions")}
+
+
+def test_model_swap_does_not_retag_old_predictions(tmp_path):
+    model_path = tmp_path / "model.json"
+    db_path = str(tmp_path / "cache.db")
+    model_path.write_text("old model")
+    old_version = file_version(model_path)
+    cache = PredictionCache(version=old_version, shared_path=db_path, watch_paths=(model_path,),
+                            prune_interval=0)
+    cache.set(b"a", 0.1)
+
+    # Replace the model under the running cache; this process still holds the old one
+    model_path.write_text("new model, different size")
+    os.utime(model_path, ns=(1, 1))
+    new_version = file_version(model_path)
+    assert new_version != old_version
+    assert cache.get(b"a") == 0.1
+    cache.set(b"b", 0.2)
+
+    assert shared_versions(db_path) == {old_version}
+
+    # A process that loaded the new model never sees the old model's values
+    fresh = PredictionCache(version=new_version, shared_path=db_path, watch_paths=(model_path,),
+                            prune_interval=0)
+    assert fresh.get(b"a") is None
+    assert fresh.get(b"b") is None
+
+    # Only the process running the files on disk drops the other version's rows
+    fresh.set(b"c", 0.3)
+    cache.set(b"d", 0.4)
+    assert shared_versions(db_path) == {old_version, new_version}
+    fresh.set(b"e", 0.5)
+    assert shared_versions(db_path) == {new_version}
@@ -0,0 +1,10 @@
+import os
+
+from app.engine import check_parity
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "xgb_delay_model.json")
+
+
+def test_numpy_engine_matches_booster():
+    # check_parity raises on its own; the assert keeps the tolerance visible here
+    assert check_parity(MODEL_PATH, atol=1e-5) <= 1e-5
@@ -0,0 +1,63 @@
+"""Benchmark backend/flight_delay_api: startup, preprocess_input, predict_flights and /predict under load.
+
+The service is pointed at the synthetic flights.csv through its environment
+variables, and its derived artifacts (slim feather, route index and slots) are
+built from scratch in the work directory, so ``startup`` includes ingest. The
+prediction cache is disabled: these numbers are for the scoring path itself.
+"""
+import importlib
+import os
+import sys
+import warnings
+
+import httpx
+import pandas as pd
+
+from harness import REPO, bench_args, flight_requests, load_async, once, timed, write_results
+
+API_DIR = os.path.join(REPO, "backend", "flight_delay_api")
+ARTIFACTS = {"SLIM_DATA_PATH": "flights.feather", "ROUTE_INDEX_PATH": "route_distance.pkl",
+             "ROUTE_SLOTS_PATH": "route_slots.feather"}
+
+
+def main():
+    args = bench_args(__doc__)
+    warnings.filterwarnings("ignore")  # sklearn version warnings from unpickling the encoders
+    os.environ.update({
+        "DATA_PATH": os.path.join(args.data, "flights.csv"),
+        "MODEL_PATH": os.path.join(API_DIR, "models", "xgb_delay_model.json"),
+        "ENCODER_PATH": os.path.join(API_DIR, "models", "encoders.pkl"),
+        "PREDICTION_CACHE_SIZE": "0",
+    })
+    for var, name in ARTIFACTS.items():
+        path = os.path.join(args.work, name)
+        if os.path.exists(path):
+            os.remove(path)  # cold start every run
+        os.environ[var] = path
+    sys.path.insert(0, API_DIR)
+
+    results = []
+    result, main_module = once("api: startup", importlib.import_module, "app.main")
+    results.append(result)
+    model_utils = importlib.import_module("app.model_utils")
+
+    flights = flight_requests(args.data, args.iterations, args.seed)
+    results.append(timed("api: preprocess_input", model_utils.preprocess_input,
+                         [tuple(f.values()) for f in flights]))
+    batch = pd.DataFrame(flights[:1000])
+    results.append(timed("api: predict_flights[1000 rows]", model_utils.predict_flights,
+                         [(batch,)] * max(args.iterations // 100, 20), warmup=2))
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main_module.app), base_url="http://bench")
+
+    async def send(body):
+        response = await client.post("/predict", json=body)
+        response.raise_for_status()
+
+    results.append(load_async("api: POST /predict", send, flight_requests(args.data, args.requests, args.seed + 1),
+                              args.concurrency))
+    write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
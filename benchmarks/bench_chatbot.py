@@ -0,0 +1,101 @@
+"""Benchmark the Flight Delay Chatbot: startup, historical_probability, parse_free_text and /chat under load.
+
+The memory backend loads the synthetic flights_2015_lite.parquet and builds its
+index artifact from scratch in the work directory; with ``--chatbot-backend
+sqlite`` the parquet is first converted into a fresh flights.db there. No LLM
+provider is configured and the prediction cache is off, so every message is
+answered from the data.
+"""
+import importlib
+import os
+import shutil
+import sys
+
+import httpx
+
+from harness import REPO, bench_args, flight_requests, load_async, once, timed, write_results
+
+CHATBOT_DIR = os.path.join(REPO, "Flight Delay Chatbot")
+PARQUET = "flights_2015_lite.parquet"
+
+# Follow-up messages sent with the context a PREDICT leaves behind
+FOLLOW_UPS = {"explain": "explain", "alternatives": "alternatives", "next flights": "next flights",
+              "cheap flights": "cheap flights", "analytics": "worst routes"}
+
+
+def predict_message(flight) -> str:
+    hh, mm = divmod(flight["sched_departure"], 100)
+    return (f"predict {flight['airline']} {flight['origin']} to {flight['destination']} "
+            f"{flight['date']} {hh}:{mm:02d}")
+
+
+def predicted_context(flight) -> dict:
+    """The context /chat returns after a PREDICT for this flight."""
+    return {**flight, "month": int(flight["date"][5:7]), "dep_hour": flight["sched_departure"] // 100,
+            "last_delay_probability": 0.2}
+
+
+def chat_requests(flights, intent=None):
+    """(message, context) pairs; all intents round-robin unless one is given."""
+    intents = ["predict", *FOLLOW_UPS] if intent is None else [intent]
+    requests = []
+    for i, flight in enumerate(flights):
+        kind = intents[i % len(intents)]
+        if kind == "predict":
+            requests.append((predict_message(flight), {}))
+        else:
+            requests.append((FOLLOW_UPS[kind], predicted_context(flight)))
+    return requests
+
+
+def main():
+    args = bench_args(__doc__)
+    for var in ("OPENAI_API_KEY", "GEMINI_API_KEY", "DB_URL"):
+        os.environ.pop(var, None)
+    artifact_dir = os.path.join(args.work, "artifacts")
+    os.environ.update({"CHATBOT_BACKEND": args.chatbot_backend, "CHATBOT_ARTIFACT_DIR": artifact_dir,
+                       "PREDICTION_CACHE_SIZE": "0"})
+    sys.path.insert(0, CHATBOT_DIR)
+
+    results = []
+    if args.chatbot_backend == "sqlite":
+        from convert_to_sqlite import convert
+        db_path = os.path.join(args.work, "flights.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        result, _ = once("chatbot: build flights.db", convert, [os.path.join(args.data, PARQUET)], db_path)
+        results.append(result)
+        os.chdir(args.work)  # the server opens flights.db from its working directory
+    else:
+        if os.path.isdir(artifact_dir):
+            shutil.rmtree(artifact_dir)  # cold start every run
+        os.chdir(args.data)  # ... and flights_2015_lite.parquet
+
+    result, server = once("chatbot: startup", importlib.import_module, "chatbot_server")
+    results.append(result)
+
+    flights = flight_requests(args.data, args.iterations, args.seed)
+    results.append(timed("chatbot: historical_probability", server.historical_probability,
+                         [(f["airline"], f["origin"], f["destination"], int(f["date"][5:7]),
+                           f["sched_departure"] // 100) for f in flights]))
+    results.append(timed("chatbot: parse_free_text", server.parse_free_text,
+                         [(predict_message(f),) for f in flights]))
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench")
+
+    async def send(request):
+        message, context = request
+        response = await client.post("/chat", json={"message": message, "context": context})
+        response.raise_for_status()
+
+    flights = flight_requests(args.data, args.requests, args.seed + 1)
+    results.append(load_async("chatbot: POST /chat (mixed)", send, chat_requests(flights), args.concurrency))
+    for intent in ["predict", "alternatives", "next flights", "cheap flights"]:
+        results.append(load_async(f"chatbot: POST /chat ({intent})", send,
+                                  chat_requests(flights[:max(args.requests // 4, 50)], intent), args.concurrency))
+    write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark backend/airline_route_delay: startup, route_stats and /route-performance under load.
+
+The Flask app loads the synthetic unique_flights.csv from the dataset
+directory. ``route_stats`` is timed uncached; the load test goes through the
+app's per-route response cache like production traffic does.
+"""
+import importlib
+import os
+import sys
+import threading
+
+from harness import REPO, bench_args, flight_requests, load_threads, once, timed, write_results
+
+ROUTE_DELAY_DIR = os.path.join(REPO, "backend", "airline_route_delay")
+
+
+def main():
+    args = bench_args(__doc__)
+    os.chdir(args.data)  # the app reads unique_flights.csv from its working directory
+    sys.path.insert(0, ROUTE_DELAY_DIR)
+
+    results = []
+    result, app_module = once("routes: startup", importlib.import_module, "app")
+    results.append(result)
+
+    # Every other query filters on the airline too
+    queries = [(f["origin"], f["destination"], f["airline"] if i % 2 else None)
+               for i, f in enumerate(flight_requests(args.data, args.iterations, args.seed))]
+    results.append(timed("routes: route_stats", app_module.route_stats,
+                         [(app_module.DATASET.index, *q) for q in queries]))
+
+    clients = threading.local()
+
+    def send(query):
+        if not hasattr(clients, "client"):
+            clients.client = app_module.app.test_client()
+        origin, destination, airline = query
+        url = f"/route-performance?origin={origin}&destination={destination}"
+        response = clients.client.get(url + (f"&airline={airline}" if airline else ""))
+        if response.status_code not in (200, 404):
+            raise RuntimeError(f"{url}: HTTP {response.status_code}")
+
+    requests = [(f["origin"], f["destination"], f["airline"] if i % 2 else None)
+                for i, f in enumerate(flight_requests(args.data, args.requests, args.seed + 1))]
+    results.append(load_threads("routes: GET /route-performance", send, requests, args.concurrency))
+    write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
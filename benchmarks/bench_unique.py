@@ -0,0 +1,50 @@
+"""Benchmark the unique.py per-flight aggregation (airline_route_delay) on the synthetic flights.csv.
+
+Runs the streaming build the way ``unique.py --chunksize`` does, timing each
+stage separately: partial aggregates per chunk, merging them, and the final
+summarize + finalize. CSV parsing is not timed.
+"""
+import os
+import sys
+import time
+
+from harness import REPO, bench_args, once, summarize, write_results
+from synthetic import read_flights_csv, unique_input
+
+sys.path.insert(0, os.path.join(REPO, "backend", "airline_route_delay"))
+import unique  # noqa: E402
+
+CHUNK_ROWS = 100_000
+
+
+def main():
+    args = bench_args(__doc__)
+    results = []
+    partials, merges = [], []
+    partial, rows = None, 0
+    for chunk in read_flights_csv(os.path.join(args.data, "flights.csv"), CHUNK_ROWS):
+        frame = unique_input(chunk)
+        t = time.perf_counter()
+        chunk_partial = unique.partial_aggregate(frame)
+        partials.append(time.perf_counter() - t)
+        if partial is None:
+            partial = chunk_partial
+        else:
+            t = time.perf_counter()
+            partial = unique.merge_partials(partial, chunk_partial)
+            merges.append(time.perf_counter() - t)
+        rows += len(frame)
+
+    wall = sum(partials)
+    results.append(summarize(f"unique: partial_aggregate[{CHUNK_ROWS // 1000}k rows]", partials, wall,
+                             rows_per_s=round(rows / wall)))
+    if merges:  # a single chunk has nothing to merge
+        results.append(summarize("unique: merge_partials", merges, sum(merges)))
+    result, _ = once("unique: summarize + finalize",
+                     lambda: unique.finalize(unique.summarize_partials(partial)))
+    results.append(result)
+    write_results(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Timing helpers shared by the bench_*.py scripts.
+
+Every measurement ends up as one result dict::
+
+    {"name": ..., "n": ..., "ops_per_s": ..., "p50_ms": ..., "p99_ms": ..., "peak_rss_mb": ...}
+
+``peak_rss_mb`` is the process high-water mark when the measurement finished,
+so within one bench script it only grows. Each bench script runs in its own
+process (see run.py), which keeps the services' module-level state and memory
+apart.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far.
+
+    On Linux this is VmHWM, which starts fresh at exec; ru_maxrss would carry
+    over the high-water mark of the parent that forked us (run.py, which may
+    just have generated 10M rows).
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(name: str, latencies, wall: float, **extra) -> dict:
+    """Throughput and latency percentiles of ``len(latencies)`` operations that took ``wall`` seconds."""
+    ms = np.asarray(latencies, dtype=float) * 1000
+    result = {
+        "name": name,
+        "n": len(ms),
+        "ops_per_s": round(len(ms) / wall, 1) if wall > 0 else float("inf"),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    result.update(extra)
+    print(f"  {name:<40} {result['ops_per_s']:>10,.1f}/s  p50 {result['p50_ms']:>9.3f} ms  "
+          f"p99 {result['p99_ms']:>9.3f} ms  rss {result['peak_rss_mb']:>7.1f} MB", flush=True)
+    return result
+
+
+def timed(name: str, fn, inputs, warmup: int = 10, **extra) -> dict:
+    """Call ``fn(*args)`` once per item of ``inputs``, one at a time, timing every call."""
+    inputs = list(inputs)
+    for args in inputs[:warmup]:
+        fn(*args)
+    latencies = []
+    start = time.perf_counter()
+    for args in inputs:
+        t = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - t)
+    return summarize(name, latencies, time.perf_counter() - start, **extra)
+
+
+def once(name: str, fn, *args, **extra):
+    """Time a single call (e.g. a startup or a full rebuild); returns (result dict, fn's return value)."""
+    t = time.perf_counter()
+    value = fn(*args)
+    wall = time.perf_counter() - t
+    return summarize(name, [wall], wall, **extra), value
+
+
+def load_async(name: str, send, requests, concurrency: int, warmup: int = 10, **extra) -> dict:
+    """Closed-loop load: ``concurrency`` workers await ``send(request)`` until ``requests`` run out.
+
+    ``send`` is a coroutine function; the latency of a request is measured
+    from when a worker picks it up until its response arrives.
+    """
+    async def run():
+        for request in requests[:warmup]:
+            await send(request)
+        queue = iter(requests)
+        latencies = []
+
+        async def worker():
+            for request in queue:
+                t = time.perf_counter()
+                await send(request)
+                latencies.append(time.perf_counter() - t)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, time.perf_counter() - start
+
+    latencies, wall = asyncio.run(run())
+    return summarize(name, latencies, wall, concurrency=concurrency, **extra)
+
+
+def load_threads(name: str, send, requests, concurrency: int, warmup: int = 10, **extra) -> dict:
+    """Closed-loop load for sync (WSGI) clients: ``concurrency`` threads call ``send(request)``."""
+    for request in requests[:warmup]:
+        send(request)
+    queue = iter(requests)
+    lock = threading.Lock()
+    latencies = []
+
+    def worker():
+        while True:
+            with lock:
+                request = next(queue, None)
+            if request is None:
+                return
+            t = time.perf_counter()
+            send(request)
+            elapsed = time.perf_counter() - t
+            with lock:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return summarize(name, latencies, time.perf_counter() - start, concurrency=concurrency, **extra)
+
+
+def flight_requests(data_dir: str, n: int, seed: int):
+    """``n`` reproducible flight queries (the /predict request body) drawn from the dataset's timetable.
+
+    Drawn from unique_flights.csv rather than the raw rows, so building the
+    request pool costs the same at every dataset size.
+    """
+    rng = np.random.default_rng(seed)
+    flights = pd.read_csv(os.path.join(data_dir, "unique_flights.csv"),
+                          usecols=["AIRLINE", "ORIGIN_AIRPORT", "DESTINATION_AIRPORT", "SCHEDULED_DEPARTURE"])
+    rows = flights.iloc[rng.integers(0, len(flights), n)]
+    dates = np.datetime64("2015-01-01") + rng.integers(0, 365, n).astype("timedelta64[D]")
+    return [
+        {"date": str(date), "airline": airline, "origin": origin, "destination": destination,
+         "sched_departure": int(sched)}
+        for date, airline, origin, destination, sched in zip(
+            dates, rows["AIRLINE"], rows["ORIGIN_AIRPORT"], rows["DESTINATION_AIRPORT"], rows["SCHEDULED_DEPARTURE"])
+    ]
+
+
+def bench_args(description: str) -> argparse.Namespace:
+    """Command line shared by the bench_*.py scripts."""
+    ap = argparse.ArgumentParser(description=description)
+    ap.add_argument("--data", required=True, help="dataset directory written by synthetic.py")
+    ap.add_argument("--work", required=True, help="scratch directory for the service's built artifacts")
+    ap.add_argument("--out", required=True, help="where to write the JSON results")
+    ap.add_argument("--requests", type=int, default=2000, help="requests per load test")
+    ap.add_argument("--iterations", type=int, default=5000, help="calls per micro-benchmark")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--chatbot-backend", default="memory", choices=["memory", "sqlite"])
+    args = ap.parse_args()
+    args.data, args.work, args.out = (os.path.abspath(p) for p in (args.data, args.work, args.out))
+    os.makedirs(args.work, exist_ok=True)
+    return args
+
+
+def write_results(path: str, results):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
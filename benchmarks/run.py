@@ -0,0 +1,149 @@
+"""Run the benchmark suite and compare it against the stored baseline.
+
+    python benchmarks/run.py --size 10k                   # generate data if needed, run, compare
+    python benchmarks/run.py --size 1m --only api,chatbot
+    python benchmarks/run.py --size 10k --save-baseline   # accept the current numbers
+
+Each service is benchmarked in its own process (see bench_*.py) so module-level
+state, imports and peak RSS never mix; every benchmark runs ``--repeat`` times
+and the run with the median p50 is kept. Results are written to
+``benchmarks/results/<size>.json``; baseline.json holds one result set per size.
+A benchmark regresses when its p50 or p99 latency or its peak RSS grew, or
+its throughput fell, by more than ``--tolerance`` against the baseline; the
+exit status is then 1.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from synthetic import generate, parse_size
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHES = {
+    "api": "bench_api.py",
+    "routes": "bench_routes.py",
+    "unique": "bench_unique.py",
+    "chatbot": "bench_chatbot.py",
+}
+# metric -> True if bigger is better
+METRICS = {"ops_per_s": True, "p50_ms": False, "p99_ms": False, "peak_rss_mb": False}
+
+
+def run_bench(name: str, args, data_dir: str) -> list:
+    out = os.path.join(args.work, f"{name}.json")
+    cmd = [sys.executable, os.path.join(BENCH_DIR, BENCHES[name]), "--data", data_dir,
+           "--work", os.path.join(args.work, name), "--out", out, "--requests", str(args.requests),
+           "--iterations", str(args.iterations), "--concurrency", str(args.concurrency),
+           "--seed", str(args.seed), "--chatbot-backend", args.chatbot_backend]
+    print(f"▶ {name}", flush=True)
+    subprocess.run(cmd, check=True, cwd=BENCH_DIR)
+    with open(out) as f:
+        return json.load(f)
+
+
+def median_runs(runs) -> list:
+    """Per benchmark, the result of the run with the median p50 (runs: one result list per repeat)."""
+    by_name = {}
+    for run in runs:
+        for result in run:
+            by_name.setdefault(result["name"], []).append(result)
+    return [sorted(results, key=lambda r: r["p50_ms"])[len(results) // 2] for results in by_name.values()]
+
+
+def compare(results, baseline, tolerance: float) -> list:
+    """Human-readable regressions of ``results`` against ``baseline`` (both lists of result dicts)."""
+    previous = {r["name"]: r for r in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get(result["name"])
+        if base is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{result['name']}: {metric} {old:g} -> {new:g} ({change:+.0%})")
+    return regressions
+
+
+def print_table(results, baseline):
+    previous = {r["name"]: r for r in baseline}
+    print(f"\n{'benchmark':<40} {'ops/s':>11} {'p50 ms':>10} {'p99 ms':>10} {'RSS MB':>8}   vs baseline (p50)")
+    for r in results:
+        base = previous.get(r["name"])
+        delta = f"{r['p50_ms'] / base['p50_ms'] - 1:+.0%}" if base and base.get("p50_ms") else "-"
+        print(f"{r['name']:<40} {r['ops_per_s']:>11,.1f} {r['p50_ms']:>10.3f} {r['p99_ms']:>10.3f} "
+              f"{r['peak_rss_mb']:>8.1f}   {delta}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the flight delay services against a stored baseline.")
+    ap.add_argument("--size", default="10k", help="dataset size: 10k, 1m, 10m or a row count")
+    ap.add_argument("--only", help=f"comma-separated subset of: {', '.join(BENCHES)}")
+    ap.add_argument("--data", help="dataset directory (default: benchmarks/data/<size>)")
+    ap.add_argument("--work", help="scratch directory (default: benchmarks/data/<size>/work)")
+    ap.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+    ap.add_argument("--save-baseline", action="store_true", help="store these results as the baseline for --size")
+    ap.add_argument("--tolerance", type=float, default=0.5,
+                    help="allowed relative change before flagging (tighten on a quiet machine)")
+    ap.add_argument("--requests", type=int, default=2000, help="requests per load test")
+    ap.add_argument("--iterations", type=int, default=5000, help="calls per micro-benchmark")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the median run is reported")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--chatbot-backend", default="memory", choices=["memory", "sqlite"])
+    args = ap.parse_args()
+
+    size = args.size.lower()
+    data_dir = os.path.abspath(args.data or os.path.join(BENCH_DIR, "data", size))
+    args.work = os.path.abspath(args.work or os.path.join(data_dir, "work"))
+    os.makedirs(args.work, exist_ok=True)
+    names = args.only.split(",") if args.only else list(BENCHES)
+    unknown = set(names) - set(BENCHES)
+    if unknown:
+        ap.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    print(f"Dataset {size} -> {data_dir}", flush=True)
+    generate(parse_size(size), data_dir, args.seed)
+    results = []
+    for name in names:
+        results += median_runs([run_bench(name, args, data_dir) for _ in range(args.repeat)])
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    baseline = baselines.get(size, [])
+    print_table(results, baseline)
+
+    os.makedirs(os.path.join(BENCH_DIR, "results"), exist_ok=True)
+    with open(os.path.join(BENCH_DIR, "results", f"{size}.json"), "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        # Replace only the benchmarks that were run; others keep their stored numbers
+        ran = {r["name"] for r in results}
+        baselines[size] = [r for r in baseline if r["name"] not in ran] + results
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2)
+        print(f"\n✅ Baseline for {size} saved to {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"\nNo baseline for {size} yet; run with --save-baseline to store one.")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print("  " + line)
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Deterministic synthetic flights data for the benchmarks.
+
+Writes, under ``out_dir``:
+
+    flights.csv                 raw rows in the schema of flight_delay_api/data/flights.csv
+    flights_2015_lite.parquet   the chatbot's lite columns of the same rows
+    unique_flights.csv          the same rows aggregated per flight by airline_route_delay/unique.py
+    dataset.json                size, seed and row counts, used to skip regeneration
+
+Rows are drawn from a fixed timetable (airline, flight number, route, departure)
+with delay rates that depend on airline, month and hour, so the backoff tables,
+route slots and leaderboards look like the real data. The same size and seed
+always produce byte-identical files. Generation runs in chunks of one million
+rows, so 10M rows need no more memory than 1M.
+
+    python benchmarks/synthetic.py 1m --out benchmarks/data/1m
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO, "backend", "airline_route_delay"))
+import unique  # noqa: E402  (per-flight aggregation of airline_route_delay)
+
+FORMAT_VERSION = 1
+CHUNK_ROWS = 1_000_000
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+AIRLINES = ["AA", "AS", "B6", "DL", "EV", "F9", "HA", "MQ", "NK", "OO", "UA", "US", "VX", "WN"]
+AIRLINE_SHARE = [0.125, 0.030, 0.045, 0.150, 0.100, 0.015, 0.013, 0.050, 0.020, 0.100, 0.090, 0.035, 0.012, 0.215]
+AIRLINE_RISK = [0.10, -0.35, 0.25, -0.20, 0.15, 0.35, -0.60, 0.30, 0.40, 0.10, 0.20, 0.05, 0.15, 0.05]
+AIRPORTS = [
+    "ATL", "ORD", "DFW", "DEN", "LAX", "SFO", "PHX", "IAH", "LAS", "MSP", "MCO", "SEA", "DTW", "BOS",
+    "EWR", "CLT", "LGA", "SLC", "JFK", "BWI", "MDW", "DCA", "FLL", "SAN", "MIA", "PHL", "TPA", "DAL",
+    "HOU", "BNA", "PDX", "STL", "HNL", "OAK", "AUS", "MCI", "MSY", "SJC", "SMF", "SNA", "RDU", "CLE",
+    "SAT", "IAD", "PIT", "IND", "CMH", "SJU", "OGG", "ANC", "BDL", "RSW", "JAX", "ABQ", "BUR", "MKE",
+    "OMA", "ONT", "PBI", "TUS",
+]
+HOUR_SHARE = np.array([1, 0, 0, 0, 1, 12, 30, 34, 32, 30, 28, 27, 28, 28, 27, 28, 30, 30, 29, 26, 20, 14, 6, 2],
+                      dtype=float)
+MONTH_RISK = [0.25, 0.05, 0.00, -0.15, -0.10, 0.30, 0.30, 0.15, -0.35, -0.30, -0.25, 0.30]
+
+# Column order of the Kaggle 2015 flights.csv the services were built on
+CSV_COLUMNS = [
+    "YEAR", "MONTH", "DAY", "DAY_OF_WEEK", "AIRLINE", "FLIGHT_NUMBER", "TAIL_NUMBER", "ORIGIN_AIRPORT",
+    "DESTINATION_AIRPORT", "SCHEDULED_DEPARTURE", "DEPARTURE_TIME", "DEPARTURE_DELAY", "TAXI_OUT", "WHEELS_OFF",
+    "SCHEDULED_TIME", "ELAPSED_TIME", "AIR_TIME", "DISTANCE", "WHEELS_ON", "TAXI_IN", "SCHEDULED_ARRIVAL",
+    "ARRIVAL_TIME", "ARRIVAL_DELAY", "DIVERTED", "CANCELLED", "CANCELLATION_REASON", "AIR_SYSTEM_DELAY",
+    "SECURITY_DELAY", "AIRLINE_DELAY", "LATE_AIRCRAFT_DELAY", "WEATHER_DELAY",
+]
+LITE_SCHEMA = pa.schema([
+    ("MONTH", pa.int64()), ("DAY", pa.int64()), ("DAY_OF_WEEK", pa.int64()), ("AIRLINE", pa.large_string()),
+    ("FLIGHT_NUMBER", pa.int64()), ("ORIGIN_AIRPORT", pa.large_string()),
+    ("DESTINATION_AIRPORT", pa.large_string()), ("SCHEDULED_DEPARTURE", pa.int64()),
+    ("DEPARTURE_DELAY", pa.float64()), ("ARRIVAL_DELAY", pa.float64()), ("DISTANCE", pa.int64()),
+    ("CANCELLED", pa.int64()),
+])
+
+
+def parse_size(size: str) -> int:
+    """'10k', '1m', '10m' or a plain row count."""
+    return SIZES.get(size.lower()) or int(size)
+
+
+def airport_distances() -> np.ndarray:
+    """Fixed great-circle-ish distance (miles) between every pair of AIRPORTS."""
+    rng = np.random.default_rng(2015)
+    xy = rng.uniform(0, 2200, size=(len(AIRPORTS), 2))
+    dist = np.hypot(*(xy[:, None, :] - xy[None, :, :]).transpose(2, 0, 1))
+    return np.clip(dist, 80, 2700).astype(np.int64)
+
+
+def build_timetable(rows: int, seed: int) -> pd.DataFrame:
+    """Scheduled flights the rows are drawn from; about one per hundred rows."""
+    rng = np.random.default_rng([seed, 0])
+    n = int(np.clip(rows // 100, 200, 60_000))
+    popularity = 1.0 / np.arange(1, len(AIRPORTS) + 1) ** 0.8
+    popularity /= popularity.sum()
+
+    origin = rng.choice(len(AIRPORTS), n, p=popularity)
+    dest = rng.integers(0, len(AIRPORTS) - 1, n)
+    dest = dest + (dest >= origin)  # never the origin itself
+    airline = rng.choice(len(AIRLINES), n, p=np.array(AIRLINE_SHARE) / sum(AIRLINE_SHARE))
+    hour = rng.choice(24, n, p=HOUR_SHARE / HOUR_SHARE.sum())
+    minute = rng.choice(np.arange(0, 60, 5), n)
+    distance = airport_distances()[origin, dest]
+
+    table = pd.DataFrame({
+        "AIRLINE": np.asarray(AIRLINES)[airline],
+        "ORIGIN_AIRPORT": np.asarray(AIRPORTS)[origin],
+        "DESTINATION_AIRPORT": np.asarray(AIRPORTS)[dest],
+        "SCHED_MINUTES": hour * 60 + minute,
+        "SCHEDULED_TIME": (distance / 8 + 40 + rng.integers(0, 20, n)).round(),
+        "DISTANCE": distance,
+        "RISK": np.asarray(AIRLINE_RISK)[airline] + (hour - 12) * 0.06 + rng.normal(0, 0.2, n),
+    })
+    table["FLIGHT_NUMBER"] = table.groupby("AIRLINE").cumcount() + 1
+    table["TAIL_NUMBER"] = ["N%03d%s" % (i % 900 + 100, a) for i, a in enumerate(table["AIRLINE"])]
+    return table
+
+
+def hhmm(minutes) -> np.ndarray:
+    """Minutes after midnight -> zero-padded HHMM text as in flights.csv; NaN -> empty."""
+    minutes = np.asarray(minutes, dtype=float)
+    out = np.full(len(minutes), "", dtype=object)
+    valid = ~np.isnan(minutes)
+    m = minutes[valid].astype(np.int64) % 1440
+    out[valid] = np.char.zfill((m // 60 * 100 + m % 60).astype("U4"), 4)
+    return out
+
+
+def flights_chunk(timetable: pd.DataFrame, n: int, seed: int, chunk: int) -> pd.DataFrame:
+    """``n`` raw rows of flights.csv, reproducible from (seed, chunk)."""
+    rng = np.random.default_rng([seed, chunk + 1])
+    sched = timetable.iloc[rng.integers(0, len(timetable), n)].reset_index(drop=True)
+    day_of_year = rng.integers(0, 365, n)
+    dates = pd.DatetimeIndex(np.datetime64("2015-01-01") + day_of_year.astype("timedelta64[D]"))
+    month = dates.month.to_numpy()
+
+    risk = -1.4 + sched["RISK"].to_numpy() + np.asarray(MONTH_RISK)[month - 1]
+    delayed = rng.random(n) < 1 / (1 + np.exp(-risk))
+    dep_delay = np.where(delayed, 10 + rng.exponential(35, n), rng.normal(-3, 5, n)).round()
+    cancelled = rng.random(n) < 0.015
+    diverted = ~cancelled & (rng.random(n) < 0.002)
+    dep_delay[cancelled] = np.nan
+
+    sched_dep = sched["SCHED_MINUTES"].to_numpy().astype(float)
+    sched_time = sched["SCHEDULED_TIME"].to_numpy()
+    taxi_out = (8 + rng.exponential(8, n)).round()
+    taxi_in = (3 + rng.exponential(4, n)).round()
+    air_time = (sched_time - 25 + rng.normal(0, 6, n)).round()
+    elapsed = taxi_out + air_time + taxi_in
+    arr_delay = (dep_delay + elapsed - sched_time).round()
+    for col in (taxi_out, taxi_in, air_time, elapsed, arr_delay):
+        col[cancelled] = np.nan
+    for col in (taxi_in, air_time, elapsed, arr_delay):
+        col[diverted] = np.nan
+
+    dep_time = sched_dep + dep_delay
+    wheels_off = dep_time + taxi_out
+    wheels_on = wheels_off + air_time
+    late = arr_delay >= 15
+    share = rng.dirichlet([1, 0.05, 1.5, 1.5, 0.3], n) * np.where(late, arr_delay, np.nan)[:, None]
+    share = np.where(late[:, None], share.round(), np.nan)
+
+    frame = pd.DataFrame({
+        "YEAR": 2015,
+        "MONTH": month,
+        "DAY": dates.day.to_numpy(),
+        "DAY_OF_WEEK": dates.dayofweek.to_numpy() + 1,
+        "AIRLINE": sched["AIRLINE"],
+        "FLIGHT_NUMBER": sched["FLIGHT_NUMBER"],
+        "TAIL_NUMBER": sched["TAIL_NUMBER"],
+        "ORIGIN_AIRPORT": sched["ORIGIN_AIRPORT"],
+        "DESTINATION_AIRPORT": sched["DESTINATION_AIRPORT"],
+        "SCHEDULED_DEPARTURE": hhmm(sched_dep),
+        "DEPARTURE_TIME": hhmm(dep_time),
+        "DEPARTURE_DELAY": dep_delay,
+        "TAXI_OUT": taxi_out,
+        "WHEELS_OFF": hhmm(wheels_off),
+        "SCHEDULED_TIME": sched_time,
+        "ELAPSED_TIME": elapsed,
+        "AIR_TIME": air_time,
+        "DISTANCE": sched["DISTANCE"],
+        "WHEELS_ON": hhmm(wheels_on),
+        "TAXI_IN": taxi_in,
+        "SCHEDULED_ARRIVAL": hhmm(sched_dep + sched_time),
+        "ARRIVAL_TIME": hhmm(wheels_on + taxi_in),
+        "ARRIVAL_DELAY": arr_delay,
+        "DIVERTED": diverted.astype(np.int64),
+        "CANCELLED": cancelled.astype(np.int64),
+        "CANCELLATION_REASON": np.where(cancelled, np.asarray(list("ABCD"))[rng.integers(0, 4, n)], None),
+        "AIR_SYSTEM_DELAY": share[:, 0],
+        "SECURITY_DELAY": share[:, 1],
+        "AIRLINE_DELAY": share[:, 2],
+        "LATE_AIRCRAFT_DELAY": share[:, 3],
+        "WEATHER_DELAY": share[:, 4],
+    })
+    return frame[CSV_COLUMNS]
+
+
+def lite_table(frame: pd.DataFrame) -> pa.Table:
+    """The chatbot's flights_2015_lite.parquet columns of raw rows."""
+    lite = frame[LITE_SCHEMA.names].copy()
+    lite["SCHEDULED_DEPARTURE"] = lite["SCHEDULED_DEPARTURE"].astype(np.int64)
+    return pa.Table.from_pandas(lite, schema=LITE_SCHEMA, preserve_index=False)
+
+
+def unique_input(frame: pd.DataFrame) -> pd.DataFrame:
+    """Raw rows as unique.py reads them, with the UNIQUE_FLIGHT_ID it groups on."""
+    flight_numbers = frame["FLIGHT_NUMBER"].astype(str)  # unique.py reads the mode columns as text
+    frame = frame.assign(FLIGHT_NUMBER=flight_numbers, UNIQUE_FLIGHT_ID=frame["AIRLINE"] + flight_numbers)
+    return frame[unique.INPUT_COLS]
+
+
+def read_flights_csv(path: str, chunksize: int = CHUNK_ROWS):
+    """Read a generated flights.csv back in chunks (HHMM columns as text, like the raw file)."""
+    hhmm_cols = {c: str for c in ["SCHEDULED_DEPARTURE", "DEPARTURE_TIME", "WHEELS_OFF", "WHEELS_ON",
+                                   "SCHEDULED_ARRIVAL", "ARRIVAL_TIME"]}
+    return pd.read_csv(path, dtype=hhmm_cols, chunksize=chunksize, low_memory=False)
+
+
+def generate(rows: int, out_dir: str, seed: int = 0) -> dict:
+    """Write the benchmark dataset for ``rows`` rows into ``out_dir`` (skipped if already there)."""
+    manifest_path = os.path.join(out_dir, "dataset.json")
+    manifest = {"format_version": FORMAT_VERSION, "rows": rows, "seed": seed}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            existing = json.load(f)
+        if {k: existing.get(k) for k in manifest} == manifest:
+            return existing
+    os.makedirs(out_dir, exist_ok=True)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    timetable = build_timetable(rows, seed)
+    csv_path = os.path.join(out_dir, "flights.csv")
+    parquet_path = os.path.join(out_dir, "flights_2015_lite.parquet")
+    partial = None
+    with pq.ParquetWriter(parquet_path, LITE_SCHEMA) as writer:
+        for chunk, start in enumerate(range(0, rows, CHUNK_ROWS)):
+            frame = flights_chunk(timetable, min(CHUNK_ROWS, rows - start), seed, chunk)
+            frame.to_csv(csv_path, index=False, header=chunk == 0, mode="w" if chunk == 0 else "a")
+            writer.write_table(lite_table(frame))
+            chunk_partial = unique.partial_aggregate(unique_input(frame))
+            partial = chunk_partial if partial is None else unique.merge_partials(partial, chunk_partial)
+            print(f"  {start + len(frame):>10,} / {rows:,} rows", flush=True)
+
+    unique_flights = unique.finalize(unique.summarize_partials(partial))
+    unique_flights.to_csv(os.path.join(out_dir, "unique_flights.csv"), index=False)
+
+    manifest.update({"flights": len(unique_flights), "timetable": len(timetable)})
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate a deterministic synthetic flights dataset.")
+    ap.add_argument("size", help="10k, 1m, 10m or a row count")
+    ap.add_argument("--out", help="output directory (default: benchmarks/data/<size>)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    out_dir = args.out or os.path.join(REPO, "benchmarks", "data", args.size.lower())
+    manifest = generate(parse_size(args.size), out_dir, args.seed)
+    print(f"✅ {out_dir}: {manifest['rows']:,} rows, {manifest['flights']:,} unique flights")
+
+
+if __name__ == "__main__":
+    main()
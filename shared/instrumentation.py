@@ -0,0 +1,230 @@
+"""Per-stage latency histograms, served as Prometheus text on /metrics.
+
+``stage(name)`` times a block and ``@timed(name)`` a function. Requests traced
+by ``TraceMiddleware`` (or ``start_trace``) can return their stage times in a
+``Server-Timing`` header. METRICS_ENABLED=0 makes both no-ops.
+"""
+import bisect
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+BREAKDOWN_HEADER = "X-Timing-Breakdown"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket upper bounds in seconds, from in-memory lookups to slow LLM calls
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS = {
+    "stage_duration_seconds": "Time spent in an instrumented stage.",
+    "request_duration_seconds": "Time to handle a request, by endpoint (and chatbot intent).",
+}
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels, **extra) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Registry:
+    """Histograms keyed on (metric, labels), rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, metric, seconds, **labels):
+        key = (metric, tuple(sorted((k, v) for k, v in labels.items() if v is not None)))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def render(self) -> str:
+        with self._lock:
+            snapshot = [(key, list(h.counts), h.total, h.count) for key, h in self._histograms.items()]
+        snapshot.sort(key=lambda item: item[0])
+        lines = []
+        for metric, help_text in METRICS.items():
+            rows = [row for row in snapshot if row[0][0] == metric]
+            if not rows:
+                continue
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+            for (_, labels), counts, total, count in rows:
+                cumulative = 0
+                for bound, n in zip(BUCKETS + (float("inf"),), counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{metric}_bucket{_label_text(labels, le=le)} {cumulative}")
+                lines.append(f"{metric}_sum{_label_text(labels)} {total!r}")
+                lines.append(f"{metric}_count{_label_text(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Trace:
+    """Stage times (seconds) and extra request-metric labels of one request."""
+    __slots__ = ("start", "stages", "labels")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.labels = {}
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value: every stage plus the total so far, in milliseconds."""
+        total = time.perf_counter() - self.start
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()]
+        return ", ".join(parts + [f"total;dur={total * 1000:.3f}"])
+
+
+_current_trace = contextvars.ContextVar("instrumentation_trace", default=None)
+
+
+def record(name, seconds):
+    """Add one stage timing to the histograms and to the current request's trace."""
+    REGISTRY.observe("stage_duration_seconds", seconds, stage=name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.stages[name] = trace.stages.get(name, 0.0) + seconds
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name):
+    """Context manager timing the enclosed block as stage ``name``."""
+    return _Stage(name) if ENABLED else _NO_STAGE
+
+
+def timed(name=None):
+    """Decorator timing every call of a function (sync or async) as stage ``name``."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        label = name or fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    record(label, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def start_trace():
+    """Begin tracing the current request; returns ``(trace, token)`` for ``finish_trace``."""
+    trace = Trace()
+    return trace, _current_trace.set(trace)
+
+
+def finish_trace(trace, token, endpoint):
+    """Stop tracing and record the request's total time under ``endpoint`` and its labels."""
+    _current_trace.reset(token)
+    REGISTRY.observe("request_duration_seconds", time.perf_counter() - trace.start,
+                     endpoint=endpoint, **trace.labels)
+
+
+def label_request(**labels):
+    """Attach labels (e.g. the chatbot intent) to the current request's duration metric."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.labels.update(labels)
+
+
+def wants_breakdown(header_value) -> bool:
+    return (header_value or "").strip().lower() in ("1", "true", "yes")
+
+
+class TraceMiddleware:
+    """ASGI middleware recording ``request_duration_seconds`` per route, plus ``Server-Timing`` on request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trace, token = start_trace()
+        header = BREAKDOWN_HEADER.lower().encode()
+        breakdown = any(k == header and wants_breakdown(v.decode("latin-1")) for k, v in scope["headers"])
+
+        async def send_with_timing(message):
+            if breakdown and message["type"] == "http.response.start":
+                headers = list(message.get("headers", [])) + [(b"server-timing", trace.server_timing().encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing if breakdown else send)
+        finally:
+            # The router stores the matched route in the scope; unmatched paths share one label
+            finish_trace(trace, token, getattr(scope.get("route"), "path", "unmatched"))
+
+
+def render() -> str:
+    return REGISTRY.render()
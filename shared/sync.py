@@ -0,0 +1,55 @@
+"""Copy the shared modules into the services that vendor them.
+
+    python shared/sync.py          # rewrite the vendored copies
+    python shared/sync.py --check  # exit 1 if a copy is out of date
+
+Each service is deployed from its own folder, so the modules here are copied
+in rather than imported. Edit the source in shared/ and re-run this script.
+"""
+import os
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARED_DIR = os.path.join(REPO, "shared")
+# source in shared/ -> vendored copies, relative to the repo root
+TARGETS = {
+    "prediction_cache.py": ["backend/flight_delay_api/app/cache.py", "Flight Delay Chatbot/prediction_cache.py"],
+    "instrumentation.py": ["backend/flight_delay_api/app/instrumentation.py",
+                           "backend/airline_route_delay/instrumentation.py",
+                           "Flight Delay Chatbot/instrumentation.py"],
+}
+HEADER = "# Vendored from shared/{source} by shared/sync.py; edit the source and re-run the script.\n"
+
+
+def vendored(source: str) -> str:
+    with open(os.path.join(SHARED_DIR, source), encoding="utf-8") as f:
+        return HEADER.format(source=source) + f.read()
+
+
+def sync(check: bool = False) -> list:
+    """Write every vendored copy (or with ``check``, only report them); returns the stale paths."""
+    stale = []
+    for source, targets in TARGETS.items():
+        text = vendored(source)
+        for target in targets:
+            path = os.path.join(REPO, target)
+            try:
+                with open(path, encoding="utf-8", newline="") as f:
+                    current = f.read()
+            except FileNotFoundError:
+                current = None
+            if current == text:
+                continue
+            stale.append(target)
+            if not check:
+                with open(path, "w", encoding="utf-8", newline="\n") as f:
+                    f.write(text)
+    return stale
+
+
+if __name__ == "__main__":
+    check = "--check" in sys.argv[1:]
+    stale = sync(check)
+    for target in stale:
+        print(f"{'out of date' if check else 'updated'}: {target}")
+    sys.exit(1 if check and stale else 0)